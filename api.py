@@ -0,0 +1,119 @@
+"""Read-only JSON API с комиссиями и загрузкой сетей из кэша снимков бота"""
+import gzip
+import hashlib
+import json
+import time
+
+from flask import Blueprint, Response, request
+
+
+class PayloadCache:
+    """Сериализованные ответы: JSON и gzip строятся один раз на версию снимка"""
+
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key: str, version, build) -> tuple:
+        """(etag, body, gzip_body) для версии; build вызывается только при смене версии"""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != version:
+            body = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            # Версии снимков начинаются заново после перезапуска, поэтому ETag считаем по содержимому
+            etag = f"{key.replace('/', '-')}-{hashlib.sha1(body).hexdigest()[:16]}"
+            entry = (version, etag, body, gzip.compress(body))
+            self.entries[key] = entry
+        return entry[1:]
+
+
+def snapshot_max_age(snapshot: dict, ttl: int) -> int:
+    """Сколько секунд клиент может не перезапрашивать снимок"""
+    return max(1, int(ttl - (time.time() - snapshot["ts"])))
+
+
+def create_api(bot) -> Blueprint:
+    """Blueprint с эндпоинтами /api/fees, /api/fees/<chain> и /api/load/<chain>"""
+    api = Blueprint("api", __name__, url_prefix="/api")
+    payloads = PayloadCache()
+
+    def respond(key: str, version, build, max_age: int) -> Response:
+        etag, body, gzip_body = payloads.get(key, version, build)
+        headers = {
+            "Cache-Control": f"public, max-age={max_age}",
+            "Vary": "Accept-Encoding",
+        }
+        # Сжатое и несжатое представления различаются побайтно, поэтому у каждого свой строгий ETag
+        use_gzip = bool(request.accept_encodings["gzip"])
+        if use_gzip:
+            etag = f"{etag}-gzip"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304, headers=headers)
+        elif use_gzip:
+            response = Response(gzip_body, mimetype="application/json", headers=headers)
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = Response(body, mimetype="application/json", headers=headers)
+        response.set_etag(etag)
+        return response
+
+    def unavailable(message: str, status: int = 503) -> Response:
+        response = Response(
+            json.dumps({"error": message}, ensure_ascii=False),
+            status=status,
+            mimetype="application/json",
+        )
+        if status == 503:
+            response.headers["Retry-After"] = "5"
+        return response
+
+    def fresh_snapshot(kind: str, snapshots: dict, blockchain: str, ttl: int) -> dict:
+        """Снимок из кэша; устаревший или отсутствующий снимок обновляется в фоне"""
+        snapshot = snapshots.get(blockchain)
+        if snapshot is None or time.time() - snapshot["ts"] >= ttl:
+            bot.request_refresh(kind, blockchain)
+        return snapshot
+
+    @api.route("/fees")
+    def all_fees():
+        snapshots = {}
+        for blockchain in bot.fee_fetchers:
+            snapshot = fresh_snapshot("fees", bot.fee_snapshots, blockchain, bot.fee_cache_ttl)
+            if snapshot is not None:
+                snapshots[blockchain] = snapshot
+        if not snapshots:
+            return unavailable("Данные о комиссиях еще не загружены")
+
+        version = tuple((blockchain, snapshot["version"]) for blockchain, snapshot in snapshots.items())
+        max_age = min(snapshot_max_age(snapshot, bot.fee_cache_ttl) for snapshot in snapshots.values())
+        return respond("fees", version, lambda: {"chains": snapshots}, max_age)
+
+    @api.route("/fees/<blockchain>")
+    def chain_fees(blockchain: str):
+        if blockchain not in bot.fee_fetchers:
+            return unavailable("Неизвестный блокчейн", 404)
+        snapshot = fresh_snapshot("fees", bot.fee_snapshots, blockchain, bot.fee_cache_ttl)
+        if snapshot is None:
+            return unavailable("Данные о комиссиях еще не загружены")
+
+        return respond(
+            f"fees/{blockchain}",
+            snapshot["version"],
+            lambda: dict(snapshot, chain=blockchain),
+            snapshot_max_age(snapshot, bot.fee_cache_ttl),
+        )
+
+    @api.route("/load/<blockchain>")
+    def chain_load(blockchain: str):
+        if blockchain not in bot.load_fetchers:
+            return unavailable("Неизвестный блокчейн", 404)
+        snapshot = fresh_snapshot("load", bot.load_snapshots, blockchain, bot.load_cache_ttl)
+        if snapshot is None:
+            return unavailable("Данные о загрузке еще не загружены")
+
+        return respond(
+            f"load/{blockchain}",
+            snapshot["version"],
+            lambda: dict(snapshot, chain=blockchain),
+            snapshot_max_age(snapshot, bot.load_cache_ttl),
+        )
+
+    return api
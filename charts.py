@@ -0,0 +1,162 @@
+"""Графики комиссий и загрузки: ограниченная история, кэш PNG и отрисовка в отдельном процессе"""
+import io
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Порядок и подписи уровней на графике (шрифты matplotlib не содержат emoji)
+CHART_TIERS = {
+    "urgent": "срочная",
+    "fast": "быстрая",
+    "standard": "стандартная",
+    "slow": "медленная",
+}
+
+
+class SeriesHistory:
+    """Прореженные ряды снимков: не больше одной точки на интервал, не старше span секунд"""
+
+    def __init__(self, path: str, resolution: int = 300, span: int = 7 * 86400, save_interval: float = 600):
+        self.path = path
+        self.resolution = resolution
+        self.maxlen = span // resolution
+        # Файл истории большой, поэтому пишем его реже остальных контрольных точек
+        self.save_interval = save_interval
+        self.saved_ts = time.time()
+        self.series = {}
+        self.dirty = False
+
+    def add(self, kind: str, blockchain: str, ts: float, value):
+        """Добавление точки; точка в том же интервале заменяет предыдущую"""
+        key = f"{kind}:{blockchain}"
+        points = self.series.get(key)
+        if points is None:
+            points = self.series[key] = deque(maxlen=self.maxlen)
+        if points and int(points[-1][0] // self.resolution) == int(ts // self.resolution):
+            points[-1] = (ts, value)
+        else:
+            points.append((ts, value))
+        self.dirty = True
+
+    def window(self, kind: str, blockchain: str, seconds: int, now: float) -> list:
+        """Точки за последние seconds секунд"""
+        points = self.series.get(f"{kind}:{blockchain}", ())
+        return [point for point in points if point[0] >= now - seconds]
+
+    def snapshot(self, force: bool = False) -> dict:
+        """Копия рядов для записи вне event loop; None, если изменений нет или интервал не истек"""
+        if not self.dirty or (not force and time.time() - self.saved_ts < self.save_interval):
+            return None
+        self.dirty = False
+        self.saved_ts = time.time()
+        return {key: list(points) for key, points in self.series.items()}
+
+    def write(self, data: dict):
+        """Атомарная запись рядов на диск"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def save(self):
+        """Запись рядов, если они изменились"""
+        data = self.snapshot(force=True)
+        if data is not None:
+            self.write(data)
+
+    def load(self):
+        """Загрузка рядов с диска, если файл есть"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.series = {
+                key: deque((tuple(point) for point in points), maxlen=self.maxlen)
+                for key, points in data.items()
+            }
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка загрузки истории для графиков: {e}")
+
+
+class ChartEntry:
+    """Отрисованный график и file_id после первой отправки каждым ботом"""
+    __slots__ = ("png", "file_ids")
+
+    def __init__(self, png: bytes):
+        self.png = png
+        self.file_ids = {}
+
+
+class ChartCache:
+    """LRU-кэш графиков с ограничением суммарного размера PNG"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key) -> ChartEntry:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, png: bytes) -> ChartEntry:
+        entry = self.entries.get(key)
+        if entry is not None:
+            return entry
+        entry = self.entries[key] = ChartEntry(png)
+        self.size += len(png)
+        # Вытесняем самые давно использованные графики, но не только что добавленный
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.size -= len(old.png)
+        return entry
+
+
+def render_chart(title: str, unit: str, fee_points: list, load_points: list) -> bytes:
+    """PNG с уровнями комиссий и загрузкой сети; выполняется в пуле процессов"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from datetime import datetime, timezone
+
+    fig, (ax_fee, ax_load) = plt.subplots(
+        2, 1, figsize=(8, 5), sharex=True, gridspec_kw={"height_ratios": [3, 1]}
+    )
+    try:
+        times = [datetime.fromtimestamp(ts, timezone.utc) for ts, _ in fee_points]
+        for tier, label in CHART_TIERS.items():
+            values = [tiers.get(tier) for _, tiers in fee_points]
+            if any(value is not None for value in values):
+                ax_fee.plot(times, values, label=label, linewidth=1.5)
+        ax_fee.set_title(title)
+        ax_fee.set_ylabel(unit)
+        ax_fee.grid(alpha=0.3)
+        ax_fee.legend(loc="upper left", fontsize="small")
+
+        if load_points:
+            load_times = [datetime.fromtimestamp(ts, timezone.utc) for ts, _ in load_points]
+            loads = [load for _, load in load_points]
+            ax_load.fill_between(load_times, loads, step="post", alpha=0.4)
+            ax_load.plot(load_times, loads, drawstyle="steps-post", linewidth=1)
+        ax_load.set_ylim(0, 100)
+        ax_load.set_ylabel("загрузка, %")
+        ax_load.set_xlabel("UTC")
+        ax_load.grid(alpha=0.3)
+
+        fig.autofmt_xdate()
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=100)
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
@@ -0,0 +1,170 @@
+"""Онлайн-оценщики с постоянной памятью для потоков снимков комиссий"""
+from bisect import bisect_left, insort
+from collections import deque
+
+
+class EWMA:
+    """Экспоненциально взвешенное скользящее среднее"""
+    __slots__ = ("alpha", "value", "count")
+
+    def __init__(self, alpha: float = 0.2, value: float = None, count: int = 0):
+        self.alpha = alpha
+        self.value = value
+        self.count = count
+
+    def update(self, x: float) -> float:
+        """Учет нового значения за O(1)"""
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        self.count += 1
+        return self.value
+
+    def to_dict(self) -> dict:
+        return {"alpha": self.alpha, "value": self.value, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EWMA":
+        return cls(data["alpha"], data["value"], data["count"])
+
+
+class P2Quantile:
+    """Потоковая оценка квантиля алгоритмом P² (Jain & Chlamtac) на пяти маркерах"""
+    __slots__ = ("p", "count", "q", "n", "np", "dn")
+
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.q = []  # высоты маркеров
+        self.n = [0, 1, 2, 3, 4]  # фактические позиции маркеров
+        self.np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # желаемые позиции
+        self.dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def update(self, x: float):
+        """Учет нового значения за O(1)"""
+        self.count += 1
+        q, n = self.q, self.n
+
+        if len(q) < 5:
+            insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+
+        # Корректируем центральные маркеры
+        for i in range(1, 4):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> float:
+        """Текущая оценка квантиля или None, если данных нет"""
+        if not self.q:
+            return None
+        if len(self.q) < 5:
+            return self.q[round(self.p * (len(self.q) - 1))]
+        return self.q[2]
+
+    def to_dict(self) -> dict:
+        return {"p": self.p, "count": self.count, "q": list(self.q), "n": list(self.n), "np": list(self.np)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "P2Quantile":
+        sketch = cls(data["p"])
+        sketch.count = data["count"]
+        sketch.q = list(data["q"])
+        sketch.n = list(data["n"])
+        sketch.np = list(data["np"])
+        return sketch
+
+
+class SeasonalFactors:
+    """Мультипликативные сезонные коэффициенты по периоду (по умолчанию час суток)"""
+    __slots__ = ("gamma", "factors")
+
+    def __init__(self, period: int = 24, gamma: float = 0.1, factors: list = None):
+        self.gamma = gamma
+        self.factors = list(factors) if factors else [1.0] * period
+
+    def update(self, slot: int, ratio: float):
+        """Сдвигаем коэффициент слота к наблюдаемому отношению значение/уровень"""
+        self.factors[slot] += self.gamma * (ratio - self.factors[slot])
+
+    def factor(self, slot: int) -> float:
+        """Нормированный коэффициент: среднее по всем слотам равно 1"""
+        mean = sum(self.factors) / len(self.factors)
+        return self.factors[slot] / mean if mean > 0 else 1.0
+
+    def to_dict(self) -> dict:
+        return {"gamma": self.gamma, "factors": list(self.factors)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SeasonalFactors":
+        return cls(len(data["factors"]), data["gamma"], data["factors"])
+
+
+class WindowQuantiles:
+    """Квантили по скользящему окну последних ключей (например, слотов) с инкрементальным обновлением"""
+    __slots__ = ("size", "window", "ordered", "last_key")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.window = deque()  # (ключ, значение) в порядке поступления
+        self.ordered = []  # те же значения, отсортированные
+        self.last_key = None
+
+    def extend(self, items) -> int:
+        """Добавление только новых пар (ключ, значение); старые вытесняются из окна"""
+        added = 0
+        for key, value in sorted(items):
+            if self.last_key is not None and key <= self.last_key:
+                continue
+            self.window.append((key, value))
+            insort(self.ordered, value)
+            self.last_key = key
+            added += 1
+            if len(self.window) > self.size:
+                _, old = self.window.popleft()
+                del self.ordered[bisect_left(self.ordered, old)]
+        return added
+
+    def quantiles(self, ps) -> dict:
+        """Квантили с линейной интерполяцией по отсортированному окну"""
+        if not self.ordered:
+            return None
+        last = len(self.ordered) - 1
+        result = {}
+        for p in ps:
+            position = p * last
+            low = int(position)
+            high = min(low + 1, last)
+            result[p] = self.ordered[low] + (self.ordered[high] - self.ordered[low]) * (position - low)
+        return result
@@ -0,0 +1,196 @@
+"""Прогноз комиссий на следующий час по потоку снимков с фиксированной памятью на сеть"""
+import json
+import logging
+import os
+import time
+
+from estimators import EWMA, P2Quantile, SeasonalFactors
+
+logger = logging.getLogger(__name__)
+
+# Квантили отношения факт/прогноз, по которым строится диапазон и вероятность подтверждения
+RESIDUAL_QUANTILES = (0.1, 0.5, 0.9)
+
+
+class TierModel:
+    """Модель одного уровня комиссии: уровень EWMA, суточная сезонность и квантили остатков"""
+    __slots__ = ("level", "seasonal", "residuals")
+
+    def __init__(self, level: EWMA = None, seasonal: SeasonalFactors = None, residuals: dict = None):
+        self.level = level or EWMA(alpha=0.2)
+        self.seasonal = seasonal or SeasonalFactors(period=24, gamma=0.1)
+        self.residuals = residuals or {p: P2Quantile(p) for p in RESIDUAL_QUANTILES}
+
+    def update(self, value: float, hour: int):
+        """Учет нового значения за O(1)"""
+        season = self.seasonal.factor(hour)
+        level = self.level.value
+        if level:
+            expected = level * season
+            if expected > 0:
+                ratio = value / expected
+                for sketch in self.residuals.values():
+                    sketch.update(ratio)
+            self.seasonal.update(hour, value / level)
+        self.level.update(value / season if season > 0 else value)
+
+    def predict(self, hour: int) -> dict:
+        """Точечный прогноз и квантили для заданного часа"""
+        if self.level.value is None:
+            return None
+        point = self.level.value * self.seasonal.factor(hour)
+        bands = {}
+        for p, sketch in self.residuals.items():
+            ratio = sketch.value()
+            bands[p] = point * ratio if ratio is not None else point
+        return {"point": point, "bands": bands}
+
+    def likelihood(self, bid: float, hour: int) -> float:
+        """Вероятность, что комиссии bid хватит в течение заданного часа"""
+        prediction = self.predict(hour)
+        if prediction is None:
+            return None
+        # При равных значениях квантилей (постоянная комиссия) берем наибольший p
+        levels = {}
+        for p, value in prediction["bands"].items():
+            levels[value] = max(p, levels.get(value, 0.0))
+        points = sorted(levels.items())
+        # Кусочно-линейная функция распределения по известным квантилям
+        if bid <= points[0][0]:
+            if bid == points[0][0]:
+                return points[0][1]
+            return points[0][1] * bid / points[0][0] if points[0][0] > 0 else 0.0
+        for (low_value, low_p), (high_value, high_p) in zip(points, points[1:]):
+            if bid <= high_value:
+                return low_p + (high_p - low_p) * (bid - low_value) / (high_value - low_value)
+        top_value, top_p = points[-1]
+        return min(0.99, top_p + (1 - top_p) * (1 - top_value / bid))
+
+    def to_dict(self) -> dict:
+        return {
+            "level": self.level.to_dict(),
+            "seasonal": self.seasonal.to_dict(),
+            "residuals": [sketch.to_dict() for sketch in self.residuals.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TierModel":
+        residuals = {}
+        for item in data["residuals"]:
+            sketch = P2Quantile.from_dict(item)
+            residuals[sketch.p] = sketch
+        return cls(EWMA.from_dict(data["level"]), SeasonalFactors.from_dict(data["seasonal"]), residuals)
+
+
+class ChainModel:
+    """Набор моделей уровней комиссии одной сети"""
+    __slots__ = ("unit", "tiers", "last_ts", "count")
+
+    def __init__(self, unit: str, tiers: dict = None, last_ts: float = 0.0, count: int = 0):
+        self.unit = unit
+        self.tiers = tiers or {}
+        self.last_ts = last_ts
+        self.count = count
+
+    def to_dict(self) -> dict:
+        return {
+            "unit": self.unit,
+            "last_ts": self.last_ts,
+            "count": self.count,
+            "tiers": {name: model.to_dict() for name, model in self.tiers.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChainModel":
+        tiers = {name: TierModel.from_dict(item) for name, item in data["tiers"].items()}
+        return cls(data["unit"], tiers, data["last_ts"], data["count"])
+
+
+class FeeForecaster:
+    """Онлайн-прогноз комиссий по всем сетям с сохранением контрольных точек"""
+
+    def __init__(self, path: str, min_interval: float = 60, min_count: int = 12):
+        self.path = path
+        self.min_interval = min_interval
+        self.min_count = min_count
+        self.chains = {}
+        self.dirty = False
+
+    def observe(self, blockchain: str, tiers: dict, unit: str, ts: float = None) -> bool:
+        """Учет снимка комиссий; слишком частые снимки пропускаются, чтобы не смещать EWMA"""
+        ts = ts or time.time()
+        model = self.chains.get(blockchain)
+        if model is None:
+            model = self.chains[blockchain] = ChainModel(unit)
+        elif ts - model.last_ts < self.min_interval:
+            return False
+
+        hour = time.gmtime(ts).tm_hour
+        for name, value in tiers.items():
+            if value is None:
+                continue
+            tier = model.tiers.get(name)
+            if tier is None:
+                tier = model.tiers[name] = TierModel()
+            tier.update(float(value), hour)
+
+        model.unit = unit
+        model.last_ts = ts
+        model.count += 1
+        self.dirty = True
+        return True
+
+    def forecast(self, blockchain: str, current: dict, ts: float = None) -> dict:
+        """Прогноз на следующий час: ожидаемые значения, диапазон и вероятность подтверждения"""
+        model = self.chains.get(blockchain)
+        if model is None or model.count < self.min_count:
+            return None
+        ts = ts or time.time()
+        next_hour = time.gmtime(ts + 3600).tm_hour
+        # Вероятность подтверждения оцениваем по минимальному уровню, которого обычно хватает
+        reference = model.tiers.get("slow") or model.tiers.get("standard")
+
+        result = {"unit": model.unit, "count": model.count, "hour": next_hour, "tiers": {}}
+        for name, tier in model.tiers.items():
+            prediction = tier.predict(next_hour)
+            if prediction is None:
+                continue
+            bid = current.get(name)
+            if bid is not None and reference is not None:
+                prediction["likelihood"] = reference.likelihood(bid, next_hour)
+            result["tiers"][name] = prediction
+        return result
+
+    def snapshot(self) -> dict:
+        """Копия моделей для записи вне event loop или None, если изменений нет"""
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return {name: model.to_dict() for name, model in self.chains.items()}
+
+    def write(self, data: dict):
+        """Атомарная запись контрольной точки на диск"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def save(self):
+        """Запись контрольной точки, если модели изменились"""
+        data = self.snapshot()
+        if data is not None:
+            self.write(data)
+
+    def load(self):
+        """Восстановление моделей из контрольной точки, если она есть"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.chains = {name: ChainModel.from_dict(item) for name, item in data.items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка загрузки контрольной точки прогноза: {e}")
@@ -1,6 +1,6 @@
-
 from flask import Flask
 import threading
+from api import create_api
 
 app = Flask(__name__)
 
@@ -15,7 +15,10 @@ def status():
 def run():
     app.run(host='0.0.0.0', port=5000, debug=False)
 
-def keep_alive():
+def keep_alive(bot=None):
+    # JSON API отвечает из кэша снимков бота, если бот передан
+    if bot is not None:
+        app.register_blueprint(create_api(bot))
     t = threading.Thread(target=run)
     t.daemon = True
     t.start()
@@ -1,12 +1,28 @@
 import asyncio
 import logging
 import os
+import time
+import functools
+import multiprocessing
 import requests
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 from dotenv import load_dotenv
+import signal
 import threading
 from keep_alive import keep_alive
+from forecast import FeeForecaster
+from rollups import BestTimeRollups, WEEKDAYS, WEEKDAY_KEYS
+from charts import SeriesHistory, ChartCache, render_chart
+from scheduler import UpdateScheduler, IntakeQueue
+from tenants import load_tenants
+from estimators import WindowQuantiles
+from rpc import build_batch, parse_batch, hex_to_int
+from preferences import PreferencesStore, CURRENCY_SYMBOLS, TX_PROFILES, DEFAULT_CURRENCY, DEFAULT_PROFILE
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -18,45 +34,324 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Каталог для файлов состояния и период сохранения контрольных точек (сек)
+STATE_DIR = os.getenv('STATE_DIR', 'state')
+CHECKPOINT_INTERVAL = int(os.getenv('CHECKPOINT_INTERVAL', '60'))
+
+# Время жизни кэша снимков комиссий и цен (сек)
+FEE_CACHE_TTL = int(os.getenv('FEE_CACHE_TTL', '30'))
+PRICE_CACHE_TTL = int(os.getenv('PRICE_CACHE_TTL', '60'))
+PRICE_RETRY_DELAY = int(os.getenv('PRICE_RETRY_DELAY', '15'))
+LOAD_CACHE_TTL = int(os.getenv('LOAD_CACHE_TTL', '30'))
+
+# Размер пула обработчиков, предел принятых обновлений на все тенанты и на один чат, размер
+# очереди приема каждого тенанта и порог, после которого отвечаем из кэша
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', '16'))
+MAX_PENDING_UPDATES = int(os.getenv('MAX_PENDING_UPDATES', '256'))
+MAX_CHAT_PENDING = int(os.getenv('MAX_CHAT_PENDING', '4'))
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE', '100'))
+SHED_THRESHOLD = int(os.getenv('SHED_THRESHOLD', '64'))
+
+# Прогрессивные ответы: сразу показываем последний снимок, затем обновляем сообщение
+PROGRESSIVE_RESPONSES = os.getenv('PROGRESSIVE_RESPONSES', '1') == '1'
+
+# Графики: окна истории (сек), процессы отрисовки и предел кэша PNG (байт)
+CHART_WINDOWS = {"24h": 86400, "7d": 7 * 86400}
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', '2'))
+CHART_CACHE_BYTES = int(os.getenv('CHART_CACHE_BYTES', str(8 * 1024 * 1024)))
+
+CHAIN_TITLES = {
+    "ton": "🟣 TON",
+    "bitcoin": "🟠 Bitcoin",
+    "ethereum": "🔵 Ethereum",
+    "bsc": "🟡 BSC",
+    "solana": "🟢 Solana",
+    "tron": "🔴 Tron",
+    "polygon": "🟪 Polygon",
+    "arbitrum": "🔷 Arbitrum",
+}
+
+# JSON-RPC узлы; все вызовы одного обновления уходят одним пакетным запросом
+RPC_URLS = {
+    "ethereum": os.getenv('ETHEREUM_RPC_URL', 'https://ethereum-rpc.publicnode.com'),
+    "bsc": os.getenv('BSC_RPC_URL', 'https://bsc-dataseed.bnbchain.org'),
+    "polygon": os.getenv('POLYGON_RPC_URL', 'https://polygon-rpc.com'),
+    "arbitrum": os.getenv('ARBITRUM_RPC_URL', 'https://arb1.arbitrum.io/rpc'),
+    "solana": os.getenv('SOLANA_RPC_URL', 'https://api.mainnet-beta.solana.com'),
+}
+
+# Число блоков для eth_feeHistory и перцентили чаевых для медленной/стандартной/быстрой комиссии
+FEE_HISTORY_BLOCKS = 5
+FEE_HISTORY_PERCENTILES = [25, 50, 90]
+
+# Лимит вычислительных единиц простой транзакции Solana для пересчета приоритетной комиссии
+SOLANA_COMPUTE_UNITS = 200000
+SOLANA_BASE_FEE_LAMPORTS = 5000
+
+# Скользящее окно приоритетных комиссий Solana (слотов) и уровни: медленная p25 ... срочная p95
+SOLANA_FEE_WINDOW_SLOTS = int(os.getenv('SOLANA_FEE_WINDOW_SLOTS', '450'))
+SOLANA_FEE_TIERS = {
+    "slow": 0.25,
+    "standard": 0.5,
+    "fast": 0.75,
+    "urgent": 0.95,
+}
+
+
+def parse_hot_accounts(value: str) -> dict:
+    """Наборы горячих аккаунтов Solana из строки вида jupiter:addr1,addr2;raydium:addr3"""
+    accounts = {}
+    for group in filter(None, value.split(";")):
+        name, _, addresses = group.partition(":")
+        addresses = [address.strip() for address in addresses.split(",") if address.strip()]
+        if name.strip() and addresses:
+            accounts[name.strip()] = addresses
+    return accounts
+
+
+# Без фильтра по аккаунтам узел отдает минимальную комиссию слота (обычно 0), поэтому основные
+# уровни считаются по горячим аккаунтам; без них уровни — только нижняя граница
+SOLANA_HOT_ACCOUNTS = parse_hot_accounts(os.getenv('SOLANA_HOT_ACCOUNTS', ''))
+
+# Токен для пересчета комиссий сети в фиатную валюту (id CoinGecko)
+FEE_TOKENS = {
+    "ton": "the-open-network",
+    "bitcoin": "bitcoin",
+    "ethereum": "ethereum",
+    "bsc": "binancecoin",
+    "solana": "solana",
+    "tron": "tron",
+    "polygon": "matic-network",
+    "arbitrum": "ethereum",
+}
+PRICE_TOKENS = tuple(dict.fromkeys(FEE_TOKENS.values()))
+
+TIER_TITLES = {
+    "fast": "⚡ Быстрая",
+    "standard": "📊 Стандартная",
+    "slow": "🐌 Медленная",
+    "urgent": "🚀 Срочная",
+}
+
 class BlockchainFeesBot:
     def __init__(self):
-        self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-        if not self.bot_token:
+        self.tenants = load_tenants()
+        if not self.tenants:
             raise ValueError("TELEGRAM_BOT_TOKEN не найден в переменных окружения")
 
-        self.application = Application.builder().token(self.bot_token).build()
-        self.setup_handlers()
+        # Последние снимки комиссий по сетям и онлайн-модель прогноза
+        self.fee_snapshots = {}
+        self.forecaster = FeeForecaster(os.path.join(STATE_DIR, "forecast.json"))
+        self.forecaster.load()
+        self.rollups = BestTimeRollups(os.path.join(STATE_DIR, "besttime.json"))
+        self.rollups.load()
+        self.checkpoint_task = None
+        # Запись из пула потоков может совпасть с финальным сохранением при остановке
+        self.state_lock = threading.Lock()
+
+        # Прореженная история для графиков, кэш PNG и отрисовка в отдельных процессах
+        self.history = SeriesHistory(os.path.join(STATE_DIR, "history.json"))
+        self.history.load()
+        self.chart_cache = ChartCache(CHART_CACHE_BYTES)
+        self.chart_renders = {}
+        self.chart_executor = None
+
+        # Цены всех токенов во всех валютах и отрисованные тексты по (сеть, валюта, профиль)
+        self.prices = {}
+        self.prices_ts = 0.0
+        self.prices_retry_ts = 0.0
+        self.prices_lock = asyncio.Lock()
+        self.render_cache = {}
+
+        self.preferences = PreferencesStore(os.path.join(STATE_DIR, "preferences.json"), tuple(CHAIN_TITLES))
+        self.preferences.load()
+
+        # Снимки загрузки сетей; блокировки не дают параллельно запрашивать одну и ту же сеть
+        self.load_snapshots = {}
+        self.fee_locks = defaultdict(asyncio.Lock)
+        self.load_locks = defaultdict(asyncio.Lock)
+        self.fee_cache_ttl = FEE_CACHE_TTL
+        self.load_cache_ttl = LOAD_CACHE_TTL
+
+        # Event loop бота и снимки, обновление которых запрошено из HTTP API
+        self.loop = None
+        self.refreshing = set()
+
+        # Сообщения с ожидающим фоновым обновлением: (тенант, chat_id, message_id) -> токен показа.
+        # Личный чат пользователя имеет один id у всех ботов, поэтому тенант входит в ключ
+        self.live_views = {}
+        self.background_tasks = set()
+
+        # Общий пул HTTP-соединений; блокирующие запросы выполняются вне event loop
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=MAX_WORKERS)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self.http_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="http")
+
+        self.scheduler = UpdateScheduler(MAX_WORKERS, SHED_THRESHOLD, MAX_PENDING_UPDATES, MAX_CHAT_PENDING)
+
+        # Окна приоритетных комиссий Solana: общее ("") и по наборам горячих аккаунтов
+        self.solana_fee_windows = {
+            name: WindowQuantiles(SOLANA_FEE_WINDOW_SLOTS) for name in ("", *SOLANA_HOT_ACCOUNTS)
+        }
+
+        self.fee_fetchers = {
+            "ethereum": self.fetch_ethereum_fees,
+            "bsc": self.fetch_bsc_fees,
+            "bitcoin": self.fetch_bitcoin_fees,
+            "solana": self.fetch_solana_fees,
+            "ton": self.fetch_ton_fees,
+            "tron": self.fetch_tron_fees,
+            "polygon": self.fetch_polygon_fees,
+            "arbitrum": self.fetch_arbitrum_fees,
+        }
+        self.fee_renderers = {
+            "ethereum": self.render_ethereum_fees,
+            "bsc": self.render_bsc_fees,
+            "bitcoin": self.render_bitcoin_fees,
+            "solana": self.render_solana_fees,
+            "ton": self.render_ton_fees,
+            "tron": self.render_tron_fees,
+            "polygon": self.render_polygon_fees,
+            "arbitrum": self.render_arbitrum_fees,
+        }
+        self.load_fetchers = {
+            "ethereum": self.fetch_ethereum_load,
+            "bsc": self.fetch_bsc_load,
+            "bitcoin": self.fetch_bitcoin_load,
+            "solana": self.fetch_solana_load,
+            "ton": self.fetch_ton_load,
+            "tron": self.fetch_tron_load,
+            "polygon": self.fetch_polygon_load,
+            "arbitrum": self.fetch_arbitrum_load,
+        }
+        self.load_renderers = {
+            "ethereum": self.render_ethereum_load,
+            "bsc": self.render_bsc_load,
+            "bitcoin": self.render_bitcoin_load,
+            "solana": self.render_solana_load,
+            "ton": self.render_ton_load,
+            "tron": self.render_tron_load,
+            "polygon": self.render_polygon_load,
+            "arbitrum": self.render_arbitrum_load,
+        }
+
+        # Каждый тенант получает свой Application и обработчики; данные и HTTP-пул общие
+        for tenant in self.tenants:
+            tenant.application = (
+                Application.builder()
+                .token(tenant.token)
+                .update_queue(IntakeQueue(self.scheduler, UPDATE_QUEUE_SIZE))
+                .concurrent_updates(MAX_PENDING_UPDATES)
+                .build()
+            )
+            tenant.application.bot_data["tenant"] = tenant
+            self.setup_handlers(tenant.application)
+
+    async def startup(self):
+        """Запуск общих фоновых задач, один раз на процесс"""
+        self.loop = asyncio.get_running_loop()
+        self.checkpoint_task = asyncio.create_task(self.checkpoint_loop())
+
+    async def shutdown(self):
+        """Остановка фоновых задач и финальное сохранение состояния"""
+        if self.checkpoint_task:
+            self.checkpoint_task.cancel()
+        for task in list(self.background_tasks):
+            task.cancel()
+        self.save_state()
+        self.http_executor.shutdown(wait=False)
+        if self.chart_executor:
+            self.chart_executor.shutdown(wait=False, cancel_futures=True)
+        self.http.close()
+
+    async def checkpoint_loop(self):
+        """Периодическое сохранение контрольных точек"""
+        while True:
+            await asyncio.sleep(CHECKPOINT_INTERVAL)
+            # Сериализация и запись файлов не должны останавливать event loop
+            items = self.collect_state()
+            if items:
+                await asyncio.get_running_loop().run_in_executor(None, self.write_state, items)
+
+    def request_refresh(self, kind: str, blockchain: str):
+        """Фоновое обновление снимка по запросу из HTTP API; вызывается из потока Flask"""
+        key = (kind, blockchain)
+        if self.loop is None or key in self.refreshing:
+            return
+        self.refreshing.add(key)
+        getter = self.get_fee_snapshot if kind == "fees" else self.get_load_snapshot
+        future = asyncio.run_coroutine_threadsafe(getter(blockchain), self.loop)
+        future.add_done_callback(lambda f: self.refreshing.discard(key))
+
+    def collect_state(self, final: bool = False) -> list:
+        """Копии измененного состояния; снимаются в event loop, пока данные никто не меняет"""
+        return [
+            (store, data, message)
+            for store, data, message in (
+                (self.forecaster, self.forecaster.snapshot(), "контрольной точки прогноза"),
+                (self.rollups, self.rollups.snapshot(), "сводок по часам недели"),
+                (self.history, self.history.snapshot(force=final), "истории для графиков"),
+                (self.preferences, self.preferences.snapshot(), "настроек чатов"),
+            )
+            if data is not None
+        ]
 
-    def setup_handlers(self):
+    def write_state(self, items: list):
+        """Запись копий состояния на диск; выполняется в пуле потоков"""
+        with self.state_lock:
+            for store, data, message in items:
+                try:
+                    store.write(data)
+                except Exception as e:
+                    logger.error(f"Ошибка сохранения {message}: {e}")
+                    # Повторим запись при следующей контрольной точке
+                    store.dirty = True
+
+    def save_state(self):
+        """Сохранение состояния моделей, сводок, истории и настроек чатов на диск"""
+        self.write_state(self.collect_state(final=True))
+
+    async def http_get(self, url: str, **kwargs) -> requests.Response:
+        """GET-запрос через общий пул соединений без блокировки event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.http_executor, functools.partial(self.http.get, url, **kwargs))
+
+    async def http_post(self, url: str, **kwargs) -> requests.Response:
+        """POST-запрос через общий пул соединений без блокировки event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.http_executor, functools.partial(self.http.post, url, **kwargs))
+
+    def setup_handlers(self, application: Application):
         """Настройка обработчиков команд и коллбэков"""
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        self.application.add_handler(CallbackQueryHandler(self.button_callback))
+        # Обработчики выполняются конкурентно, но по порядку внутри каждого чата каждого тенанта
+        wrap = functools.partial(self.scheduler.wrap, scope=application.bot_data["tenant"].name)
+        application.add_handler(CommandHandler("start", wrap(self.start_command)))
+        application.add_handler(CommandHandler("forecast", wrap(self.forecast_command)))
+        application.add_handler(CommandHandler("besttime", wrap(self.besttime_command)))
+        application.add_handler(CommandHandler("chart", wrap(self.chart_command)))
+        application.add_handler(CommandHandler("settings", wrap(self.settings_command)))
+        application.add_handler(CommandHandler("currency", wrap(self.currency_command)))
+        application.add_handler(CommandHandler("favorites", wrap(self.favorites_command)))
+        application.add_handler(CommandHandler("profile", wrap(self.profile_command)))
+        application.add_handler(CallbackQueryHandler(wrap(self.button_callback)))
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
+        prefs = self.preferences.get(update.effective_chat.id)
+        chains = self.preferences.favorite_chains(prefs) or list(CHAIN_TITLES)
+
         keyboard = [
-            [
-                InlineKeyboardButton("🟣 TON", callback_data="ton"),
-                InlineKeyboardButton("🟠 Bitcoin", callback_data="bitcoin")
-            ],
-            [
-                InlineKeyboardButton("🔵 Ethereum", callback_data="ethereum"),
-                InlineKeyboardButton("🟡 BSC", callback_data="bsc")
-            ],
-            [
-                InlineKeyboardButton("🟢 Solana", callback_data="solana"),
-                InlineKeyboardButton("🔴 Tron", callback_data="tron")
-            ],
-            [
-                InlineKeyboardButton("🟪 Polygon", callback_data="polygon"),
-                InlineKeyboardButton("🔷 Arbitrum", callback_data="arbitrum")
-            ]
+            [InlineKeyboardButton(CHAIN_TITLES[chain], callback_data=chain) for chain in chains[i:i + 2]]
+            for i in range(0, len(chains), 2)
         ]
 
         reply_markup = InlineKeyboardMarkup(keyboard)
 
+        tenant = context.bot_data["tenant"]
         welcome_text = (
-            "🤖 Добро пожаловать в бот мониторинга комиссий блокчейнов!\n\n"
+            f"{tenant.welcome}\n\n"
             "Выберите блокчейн для просмотра текущих комиссий:"
         )
 
@@ -68,13 +363,27 @@ class BlockchainFeesBot:
         await query.answer()
 
         blockchain = query.data
+        prefs = self.preferences.get(update.effective_chat.id)
+        # Подпись тенанта добавляется к общему кэшированному тексту
+        tenant = context.bot_data["tenant"]
+        footer = tenant.footer
+        # Новое нажатие отменяет незавершенное фоновое обновление этого сообщения
+        view = (tenant.name, query.message.chat_id, query.message.message_id)
+        self.live_views.pop(view, None)
 
         # Проверяем, это запрос на загрузку сети
         if blockchain.endswith("_network_load"):
             original_blockchain = blockchain.replace("_network_load", "")
             try:
-                network_info = await self.get_network_load(original_blockchain)
-                await query.edit_message_text(text=network_info, reply_markup=self.get_back_keyboard(original_blockchain))
+                await self.respond_progressively(
+                    query,
+                    view,
+                    self.load_snapshots.get(original_blockchain),
+                    LOAD_CACHE_TTL,
+                    lambda stale_ok: self.get_network_load(original_blockchain, stale_ok),
+                    self.get_back_keyboard(original_blockchain),
+                    footer,
+                )
             except Exception as e:
                 logger.error(f"Ошибка получения данных загрузки для {original_blockchain}: {e}")
                 await query.edit_message_text(
@@ -82,17 +391,374 @@ class BlockchainFeesBot:
                 )
         else:
             try:
-                fees_info = await self.get_blockchain_fees(blockchain)
                 # Добавляем кнопку для проверки состояния сети
                 keyboard = [[InlineKeyboardButton("📊 Проверить состояние сети", callback_data=f"{blockchain}_network_load")]]
                 reply_markup = InlineKeyboardMarkup(keyboard)
-                await query.edit_message_text(text=fees_info, reply_markup=reply_markup)
+                await self.respond_progressively(
+                    query,
+                    view,
+                    self.fee_snapshots.get(blockchain),
+                    FEE_CACHE_TTL,
+                    lambda stale_ok: self.get_blockchain_fees(blockchain, prefs.currency, prefs.profile, stale_ok),
+                    reply_markup,
+                    footer,
+                )
             except Exception as e:
                 logger.error(f"Ошибка получения данных для {blockchain}: {e}")
                 await query.edit_message_text(
                     text=f"❌ Ошибка получения данных для {blockchain.upper()}. Попробуйте позже."
                 )
 
+    async def respond_progressively(self, query, key: tuple, snapshot: dict, ttl: int, render, reply_markup,
+                                    footer: str):
+        """Ответ на нажатие: устаревший снимок показываем сразу, свежие данные — отдельной правкой"""
+        age = time.time() - snapshot["ts"] if snapshot else None
+        if not PROGRESSIVE_RESPONSES or age is None or age < ttl or self.scheduler.saturated:
+            text = await render(False)
+            await query.edit_message_text(text=text + footer, reply_markup=reply_markup)
+            return
+
+        stale_text = await render(True)
+        token = object()
+        self.live_views[key] = token
+        await query.edit_message_text(
+            text=f"{stale_text}{footer}\n\n🔄 Обновление… данные {self.format_age(age)} назад",
+            reply_markup=reply_markup,
+        )
+
+        task = asyncio.create_task(self.finish_progressive(query, key, token, stale_text, render, reply_markup, footer))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+
+    async def finish_progressive(self, query, key: tuple, token, stale_text: str, render, reply_markup, footer: str):
+        """Фоновая загрузка свежих данных и правка сообщения; отметка об обновлении снимается всегда"""
+        try:
+            try:
+                text = await render(False)
+            except Exception as e:
+                logger.error(f"Ошибка фонового обновления данных: {e}")
+                # Оставляем последние известные данные, но без отметки об обновлении
+                text = stale_text
+
+            async def edit():
+                # Пользователь мог уже перейти к другому экрану этого сообщения
+                if self.live_views.get(key) is not token:
+                    return
+                await query.edit_message_text(text=text + footer, reply_markup=reply_markup)
+
+            # Проверка и правка в очереди чата, чтобы новое нажатие не перезаписалось устаревшим текстом
+            tenant_name, chat_id, _ = key
+            await self.scheduler.run_in_chat(tenant_name, chat_id, edit)
+        except Exception as e:
+            logger.error(f"Ошибка фонового обновления сообщения: {e}")
+        finally:
+            if self.live_views.get(key) is token:
+                del self.live_views[key]
+
+    def format_age(self, seconds: float) -> str:
+        """Возраст данных в коротком виде"""
+        if seconds < 60:
+            return f"{seconds:.0f} сек"
+        if seconds < 3600:
+            return f"{seconds / 60:.0f} мин"
+        return f"{seconds / 3600:.0f} ч"
+
+    async def forecast_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /forecast <chain>"""
+        if not context.args or context.args[0].lower() not in CHAIN_TITLES:
+            await update.message.reply_text(
+                "Использование: /forecast <сеть>\n"
+                f"Доступные сети: {', '.join(CHAIN_TITLES)}"
+            )
+            return
+
+        blockchain = context.args[0].lower()
+        try:
+            forecast_info = await self.get_forecast(blockchain)
+        except Exception as e:
+            logger.error(f"Ошибка построения прогноза для {blockchain}: {e}")
+            forecast_info = f"❌ Ошибка построения прогноза для {blockchain.upper()}. Попробуйте позже."
+        await update.message.reply_text(forecast_info)
+
+    async def get_forecast(self, blockchain: str) -> str:
+        """Прогноз комиссий и вероятности подтверждения на следующий час"""
+        # Свежий снимок одновременно обновляет модель
+        snapshot = await self.get_fee_snapshot(blockchain)
+        forecast = self.forecaster.forecast(blockchain, snapshot["tiers"] if snapshot else {})
+        title = CHAIN_TITLES[blockchain]
+
+        if not forecast or not forecast["tiers"]:
+            return (
+                f"{title} — прогноз\n\n"
+                f"📭 Недостаточно данных для прогноза\n\n"
+                f"💡 Прогноз строится только по живым данным сети"
+            )
+
+        unit = forecast["unit"]
+        lines = [f"{title} — прогноз на {forecast['hour']:02d}:00 UTC\n"]
+        for name in ("urgent", "fast", "standard", "slow"):
+            tier = forecast["tiers"].get(name)
+            if not tier:
+                continue
+            low, high = tier["bands"][0.1], tier["bands"][0.9]
+            line = f"{TIER_TITLES[name]}: ~{tier['point']:.4g} {unit} ({low:.4g}–{high:.4g})"
+            if tier.get("likelihood") is not None:
+                line += f"\n   ✅ Подтверждение по текущей цене: {tier['likelihood'] * 100:.0f}%"
+            lines.append(line)
+
+        lines.append(f"\n📈 Снимков в модели: {forecast['count']}")
+        lines.append("💡 Онлайн-модель: EWMA, суточная сезонность и квантили P²")
+        return "\n".join(lines)
+
+    async def besttime_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /besttime <chain> [tier] [day]"""
+        usage = (
+            "Использование: /besttime <сеть> [уровень] [день]\n"
+            f"Доступные сети: {', '.join(CHAIN_TITLES)}\n"
+            f"Уровни: {', '.join(TIER_TITLES)} (по умолчанию standard)\n"
+            f"Дни: {', '.join(WEEKDAY_KEYS)} — медиана и p90 по каждому часу дня"
+        )
+        args = [arg.lower() for arg in context.args or []]
+        if not args or args[0] not in CHAIN_TITLES:
+            await update.message.reply_text(usage)
+            return
+
+        blockchain = args[0]
+        tier = "standard"
+        day = None
+        for arg in args[1:3]:
+            if arg in TIER_TITLES:
+                tier = arg
+            elif arg in WEEKDAY_KEYS:
+                day = WEEKDAY_KEYS.index(arg)
+            else:
+                await update.message.reply_text(usage)
+                return
+
+        known_tiers = self.rollups.tiers(blockchain)
+        if known_tiers and tier not in known_tiers:
+            await update.message.reply_text(
+                f"{CHAIN_TITLES[blockchain]}: нет уровня {tier}\n"
+                f"Доступные уровни: {', '.join(name for name in TIER_TITLES if name in known_tiers)}"
+            )
+            return
+
+        if day is None:
+            await update.message.reply_text(self.get_besttime(blockchain, tier))
+        else:
+            await update.message.reply_text(self.get_besttime_day(blockchain, tier, day))
+
+    def get_besttime(self, blockchain: str, tier: str) -> str:
+        """Типичная комиссия по часам недели и самые дешевые окна"""
+        title = CHAIN_TITLES[blockchain]
+        unit, rows = self.rollups.table(blockchain, tier)
+        known = [(hour, row) for hour, row in enumerate(rows or []) if row is not None]
+        if not known:
+            return (
+                f"{title} — лучшее время\n\n"
+                f"📭 Пока нет данных для уровня {tier}\n\n"
+                f"💡 Сводки строятся по живым снимкам комиссий"
+            )
+
+        # Тепловая карта медиан: строка на день недели, символ на час
+        medians = [row[0] for _, row in known]
+        low, high = min(medians), max(medians)
+        levels = "▁▂▃▄▅▆▇█"
+        lines = [f"{title} — комиссии по часам недели ({TIER_TITLES.get(tier, tier)}, UTC)\n"]
+        for day, name in enumerate(WEEKDAYS):
+            cells = ""
+            for row in rows[day * 24:(day + 1) * 24]:
+                if row is None:
+                    cells += "·"
+                elif high == low:
+                    cells += levels[0]
+                else:
+                    cells += levels[int((row[0] - low) / (high - low) * (len(levels) - 1))]
+            lines.append(f"{name} {cells}")
+
+        lines.append("\n💚 Самые дешевые окна (медиана / p90):")
+        for hour, (median, p90) in sorted(known, key=lambda item: item[1][0])[:3]:
+            lines.append(f"• {WEEKDAYS[hour // 24]} {hour % 24:02d}:00 — {median:.4g} / {p90:.4g} {unit}")
+
+        most_expensive_hour, (median, p90) = max(known, key=lambda item: item[1][0])
+        lines.append(
+            f"\n🔺 Дороже всего: {WEEKDAYS[most_expensive_hour // 24]} {most_expensive_hour % 24:02d}:00 — "
+            f"{median:.4g} / {p90:.4g} {unit}"
+        )
+        lines.append(f"📊 Заполнено часов: {len(known)} из 168")
+        lines.append(f"💡 Медиана и p90 по часам дня: /besttime {blockchain} {tier} <{'|'.join(WEEKDAY_KEYS)}>")
+        return "\n".join(lines)
+
+    def get_besttime_day(self, blockchain: str, tier: str, day: int) -> str:
+        """Медиана и p90 комиссии по каждому часу одного дня недели"""
+        title = CHAIN_TITLES[blockchain]
+        unit, rows = self.rollups.table(blockchain, tier)
+        day_rows = rows[day * 24:(day + 1) * 24] if rows else []
+        known = [(hour, row) for hour, row in enumerate(day_rows) if row is not None]
+        if not known:
+            return (
+                f"{title} — {WEEKDAYS[day]}\n\n"
+                f"📭 Пока нет данных для уровня {tier}\n\n"
+                f"💡 Сводки строятся по живым снимкам комиссий"
+            )
+
+        cheapest_hour = min(known, key=lambda item: item[1][0])[0]
+        lines = [f"{title} — {WEEKDAYS[day]}, {TIER_TITLES[tier]} (медиана / p90, {unit}, UTC)\n"]
+        for hour, row in enumerate(day_rows):
+            if row is None:
+                lines.append(f"{hour:02d}:00 — нет данных")
+                continue
+            median, p90 = row
+            marker = " 💚" if hour == cheapest_hour else ""
+            lines.append(f"{hour:02d}:00 — {median:.4g} / {p90:.4g}{marker}")
+        return "\n".join(lines)
+
+    async def chart_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /chart <chain> [24h|7d]"""
+        if not context.args or context.args[0].lower() not in CHAIN_TITLES:
+            await update.message.reply_text(
+                "Использование: /chart <сеть> [24h|7d]\n"
+                f"Доступные сети: {', '.join(CHAIN_TITLES)}"
+            )
+            return
+
+        blockchain = context.args[0].lower()
+        window = context.args[1].lower() if len(context.args) > 1 else "24h"
+        if window not in CHART_WINDOWS:
+            await update.message.reply_text(f"Доступные окна: {', '.join(CHART_WINDOWS)}")
+            return
+
+        tenant = context.bot_data["tenant"]
+        try:
+            entry = await self.get_chart(blockchain, window)
+        except ImportError:
+            await update.message.reply_text("📉 Графики недоступны: не установлен matplotlib")
+            return
+        except Exception as e:
+            logger.error(f"Ошибка построения графика для {blockchain}: {e}")
+            await update.message.reply_text(f"❌ Ошибка построения графика для {blockchain.upper()}. Попробуйте позже.")
+            return
+
+        if entry is None:
+            await update.message.reply_text(
+                f"{CHAIN_TITLES[blockchain]} — график за {window}\n\n"
+                f"📭 Пока нет данных\n\n"
+                f"💡 История собирается по живым снимкам комиссий"
+            )
+            return
+
+        caption = f"{CHAIN_TITLES[blockchain]} — комиссии и загрузка за {window} (UTC)"
+        # file_id действителен только для загрузившего его бота, поэтому храним их по тенантам
+        file_id = entry.file_ids.get(tenant.name)
+        if file_id:
+            try:
+                await update.message.reply_photo(photo=file_id, caption=caption)
+                return
+            except BadRequest as e:
+                logger.warning(f"Telegram отклонил file_id графика {blockchain}: {e}")
+                entry.file_ids.pop(tenant.name, None)
+
+        message = await update.message.reply_photo(photo=entry.png, caption=caption)
+        if message.photo:
+            entry.file_ids[tenant.name] = message.photo[-1].file_id
+
+    async def get_chart(self, blockchain: str, window: str):
+        """График из кэша по (сеть, окно, версии снимков) или отрисованный в пуле процессов"""
+        fee_snapshot = await self.get_fee_snapshot(blockchain)
+        load_snapshot = await self.get_load_snapshot(blockchain)
+        key = (
+            blockchain,
+            window,
+            fee_snapshot["version"] if fee_snapshot else 0,
+            load_snapshot["version"] if load_snapshot else 0,
+        )
+        entry = self.chart_cache.get(key)
+        if entry is not None:
+            return entry
+
+        now = time.time()
+        fee_points = self.history.window("fees", blockchain, CHART_WINDOWS[window], now)
+        if not fee_points:
+            return None
+        load_points = self.history.window("load", blockchain, CHART_WINDOWS[window], now)
+
+        # Одновременные запросы одного графика ждут одну отрисовку
+        render = self.chart_renders.get(key)
+        if render is None:
+            if self.chart_executor is None:
+                # spawn: не наследуем потоки Flask и HTTP-пула через fork
+                self.chart_executor = ProcessPoolExecutor(
+                    max_workers=CHART_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            loop = asyncio.get_running_loop()
+            render = loop.run_in_executor(
+                self.chart_executor,
+                render_chart,
+                f"{blockchain.upper()} · {window}",
+                fee_snapshot["unit"] if fee_snapshot else "",
+                fee_points,
+                load_points,
+            )
+            self.chart_renders[key] = render
+        try:
+            png = await render
+        finally:
+            self.chart_renders.pop(key, None)
+        return self.chart_cache.put(key, png)
+
+    async def settings_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /settings"""
+        prefs = self.preferences.get(update.effective_chat.id)
+        favorites = self.preferences.favorite_chains(prefs)
+
+        await update.message.reply_text(
+            f"⚙️ Настройки чата\n\n"
+            f"💱 Валюта: {prefs.currency.upper()}\n"
+            f"⭐ Избранные сети: {', '.join(favorites) if favorites else 'все'}\n"
+            f"📦 Профиль транзакции: {prefs.profile}\n\n"
+            f"/currency <{'|'.join(CURRENCY_SYMBOLS)}> — валюта\n"
+            f"/favorites [сети...] — избранные сети (без аргументов — все)\n"
+            f"/profile <{'|'.join(TX_PROFILES)}> — профиль транзакции"
+        )
+
+    async def currency_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /currency <code>"""
+        if not context.args or context.args[0].lower() not in CURRENCY_SYMBOLS:
+            await update.message.reply_text(f"Использование: /currency <{'|'.join(CURRENCY_SYMBOLS)}>")
+            return
+
+        currency = context.args[0].lower()
+        self.preferences.update(update.effective_chat.id, currency=currency)
+        await update.message.reply_text(f"✅ Валюта: {currency.upper()}")
+
+    async def favorites_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /favorites [chain ...]"""
+        chains = [arg.lower() for arg in context.args]
+        unknown = [chain for chain in chains if chain not in CHAIN_TITLES]
+        if unknown:
+            await update.message.reply_text(
+                f"❌ Неизвестные сети: {', '.join(unknown)}\n"
+                f"Доступные сети: {', '.join(CHAIN_TITLES)}"
+            )
+            return
+
+        self.preferences.update(update.effective_chat.id, favorites=self.preferences.favorites_mask(chains))
+        await update.message.reply_text(
+            f"✅ Избранные сети: {', '.join(chains)}" if chains else "✅ В меню показываются все сети"
+        )
+
+    async def profile_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /profile <name>"""
+        if not context.args or context.args[0].lower() not in TX_PROFILES:
+            await update.message.reply_text(f"Использование: /profile <{'|'.join(TX_PROFILES)}>")
+            return
+
+        profile = context.args[0].lower()
+        self.preferences.update(update.effective_chat.id, profile=profile)
+        await update.message.reply_text(
+            f"✅ Профиль: расчет для {TX_PROFILES[profile]['title']} ({TX_PROFILES[profile]['gas'] // 1000}k gas в EVM-сетях)"
+        )
+
     def get_back_keyboard(self, blockchain: str) -> InlineKeyboardMarkup:
         """Создание клавиатуры для возврата к информации о комиссиях"""
         keyboard = [[InlineKeyboardButton("← Назад к комиссиям", callback_data=blockchain)]]
@@ -113,45 +779,246 @@ class BlockchainFeesBot:
         else:
             return "🟢"  # Низкая загрузка
 
-    async def get_network_load(self, blockchain: str) -> str:
+    async def get_network_load(self, blockchain: str, stale_ok: bool = False) -> str:
         """Получение информации о загрузке сети"""
+        if blockchain not in self.load_fetchers:
+            return "❌ Неизвестный блокчейн"
         try:
-            if blockchain == "ethereum":
-                return await self.get_ethereum_load()
-            elif blockchain == "bsc":
-                return await self.get_bsc_load()
-            elif blockchain == "bitcoin":
-                return await self.get_bitcoin_load()
-            elif blockchain == "solana":
-                return await self.get_solana_load()
-            elif blockchain == "ton":
-                return await self.get_ton_load()
-            elif blockchain == "tron":
-                return await self.get_tron_load()
-            elif blockchain == "polygon":
-                return await self.get_polygon_load()
-            elif blockchain == "arbitrum":
-                return await self.get_arbitrum_load()
-            else:
-                return "❌ Неизвестный блокчейн"
+            snapshot = await self.get_load_snapshot(blockchain, stale_ok)
+            return self.load_renderers[blockchain](snapshot)
         except Exception as e:
             logger.error(f"Ошибка получения данных загрузки для {blockchain}: {e}")
             raise
 
-    async def get_ethereum_load(self) -> str:
+    async def get_load_snapshot(self, blockchain: str, stale_ok: bool = False) -> dict:
+        """Снимок загрузки сети из кэша или свежий, если кэш устарел"""
+        snapshot = self.load_snapshots.get(blockchain)
+        if snapshot and (stale_ok or self.scheduler.saturated or time.time() - snapshot["ts"] < LOAD_CACHE_TTL):
+            return snapshot
+
+        async with self.load_locks[blockchain]:
+            # Пока ждали блокировку, снимок мог обновить другой обработчик
+            snapshot = self.load_snapshots.get(blockchain)
+            if snapshot and time.time() - snapshot["ts"] < LOAD_CACHE_TTL:
+                return snapshot
+
+            fresh = await self.load_fetchers[blockchain]()
+            return self.publish_load_snapshot(blockchain, fresh)
+
+    def publish_load_snapshot(self, blockchain: str, fresh: dict) -> dict:
+        """Сохранение свежего снимка загрузки сети"""
+        previous = self.load_snapshots.get(blockchain)
+        snapshot = dict(fresh, ts=time.time(), version=previous["version"] + 1 if previous else 1)
+        self.load_snapshots[blockchain] = snapshot
+        if snapshot["live"]:
+            self.history.add("load", blockchain, snapshot["ts"], snapshot["load"])
+        return snapshot
+
+    async def rpc_batch(self, url: str, calls: list) -> list:
+        """Пакет JSON-RPC вызовов одним HTTP-запросом; результаты в порядке вызовов"""
+        response = await self.http_post(url, json=build_batch(calls), timeout=10)
+        response.raise_for_status()
+        return parse_batch(response.json(), len(calls))
+
+    async def fetch_evm_rpc(self, blockchain: str) -> tuple:
+        """Комиссии и загрузка EVM-сети одним пакетным запросом: (fees, load)"""
+        try:
+            gas_price, history, block_number, priority_fee = await self.rpc_batch(RPC_URLS[blockchain], [
+                ("eth_gasPrice", []),
+                ("eth_feeHistory", [hex(FEE_HISTORY_BLOCKS), "latest", FEE_HISTORY_PERCENTILES]),
+                ("eth_blockNumber", []),
+                ("eth_maxPriorityFeePerGas", []),
+            ])
+        except Exception as e:
+            logger.error(f"Ошибка JSON-RPC {blockchain}: {e}")
+            return None, None
+
+        if gas_price is None:
+            logger.warning(f"JSON-RPC {blockchain} не вернул eth_gasPrice")
+            return None, None
+
+        try:
+            return self.parse_evm_rpc(gas_price, history, block_number, priority_fee)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            # Неполный ответ узла: вызывающий код перейдет к запасному источнику
+            logger.error(f"Некорректный ответ JSON-RPC {blockchain}: {e!r}")
+            return None, None
+
+    def parse_evm_rpc(self, gas_price: str, history: dict, block_number: str, priority_fee: str) -> tuple:
+        """Разбор пакетного ответа EVM-узла: (fees, load)"""
+        gas_price = hex_to_int(gas_price)
+        priority_fee = hex_to_int(priority_fee) or 0
+        tiers = None
+        load = None
+
+        if history:
+            # Базовая комиссия следующего блока плюс перцентили чаевых за последние блоки
+            base_fee = hex_to_int(history["baseFeePerGas"][-1])
+            rewards = history.get("reward") or []
+            if rewards:
+                tips = [
+                    sum(hex_to_int(block[i]) for block in rewards) / len(rewards)
+                    for i in range(len(FEE_HISTORY_PERCENTILES))
+                ]
+            else:
+                tips = [priority_fee] * len(FEE_HISTORY_PERCENTILES)
+            if base_fee + tips[1] > 0:
+                tiers = {
+                    "fast": self.wei_to_gwei(base_fee + tips[2]),
+                    "standard": self.wei_to_gwei(base_fee + tips[1]),
+                    "slow": self.wei_to_gwei(base_fee + tips[0]),
+                }
+
+            ratios = history.get("gasUsedRatio") or []
+            if ratios:
+                gas_used_ratio = sum(ratios) / len(ratios)
+                load = {
+                    "load": min(100, gas_used_ratio * 100),
+                    "live": True,
+                    "metrics": {
+                        "gas_price": self.wei_to_gwei(gas_price),
+                        "base_fee": self.wei_to_gwei(base_fee),
+                        "gas_used_ratio": gas_used_ratio,
+                        "block_number": hex_to_int(block_number),
+                    },
+                }
+
+        if tiers is None:
+            # Узел без eth_feeHistory: оцениваем уровни по eth_gasPrice
+            tiers = {
+                "fast": self.wei_to_gwei(gas_price + priority_fee),
+                "standard": self.wei_to_gwei(gas_price),
+                "slow": self.wei_to_gwei(gas_price),
+            }
+
+        return {"tiers": tiers, "unit": "Gwei", "live": True}, load
+
+    async def fetch_evm_fees(self, blockchain: str) -> dict:
+        """Комиссии EVM-сети через JSON-RPC; загрузка из того же ответа сразу попадает в снимок"""
+        fees, load = await self.fetch_evm_rpc(blockchain)
+        if load is not None:
+            self.publish_load_snapshot(blockchain, load)
+        return fees
+
+    async def fetch_evm_load(self, blockchain: str) -> dict:
+        """Загрузка EVM-сети через JSON-RPC; комиссии из того же ответа сразу попадают в снимок"""
+        fees, load = await self.fetch_evm_rpc(blockchain)
+        if fees is not None:
+            self.publish_fee_snapshot(blockchain, fees)
+        return load
+
+    def solana_fee_tiers(self, name: str) -> dict:
+        """Полная комиссия транзакции в SOL по квантилям окна приоритетных комиссий"""
+        quantiles = self.solana_fee_windows[name].quantiles(SOLANA_FEE_TIERS.values())
+        if quantiles is None:
+            return None
+        # Приоритетная комиссия задается в микролампортах за вычислительную единицу
+        return {
+            tier: round((SOLANA_BASE_FEE_LAMPORTS + quantiles[p] * SOLANA_COMPUTE_UNITS / 1000000) / 1000000000, 9)
+            for tier, p in SOLANA_FEE_TIERS.items()
+        }
+
+    def wei_to_gwei(self, wei: float) -> float:
+        """Перевод wei в Gwei с округлением для отображения"""
+        return round(wei / 1000000000, 3)
+
+    async def fetch_solana_rpc(self) -> tuple:
+        """Производительность, приоритетные комиссии и слот Solana одним пакетным запросом: (fees, load)"""
+        calls = [
+            ("getRecentPerformanceSamples", [1]),
+            ("getSlot", []),
+            ("getRecentPrioritizationFees", []),
+        ]
+        calls += [("getRecentPrioritizationFees", [addresses]) for addresses in SOLANA_HOT_ACCOUNTS.values()]
+        try:
+            samples, slot, *priority_fees = await self.rpc_batch(RPC_URLS["solana"], calls)
+        except Exception as e:
+            logger.error(f"Ошибка JSON-RPC Solana: {e}")
+            return None, None
+
+        try:
+            return self.parse_solana_rpc(samples, slot, priority_fees)
+        except (KeyError, IndexError, TypeError, ValueError, ZeroDivisionError) as e:
+            # Неполный ответ узла: вызывающий код перейдет к запасному источнику
+            logger.error(f"Некорректный ответ JSON-RPC Solana: {e!r}")
+            return None, None
+
+    def parse_solana_rpc(self, samples: list, slot: int, priority_fees: list) -> tuple:
+        """Разбор пакетного ответа Solana: (fees, load)"""
+        # В окна попадают только слоты новее уже учтенных
+        for name, items in zip(self.solana_fee_windows, priority_fees):
+            if items:
+                self.solana_fee_windows[name].extend(
+                    (item["slot"], item["prioritizationFee"]) for item in items
+                )
+
+        fees = None
+        tiers = self.solana_fee_tiers("")
+        if tiers:
+            groups = {}
+            for name in SOLANA_HOT_ACCOUNTS:
+                group_tiers = self.solana_fee_tiers(name)
+                if group_tiers:
+                    groups[name] = group_tiers
+            # Транзакция с горячим аккаунтом конкурирует за его блокировку, поэтому берем
+            # самый дорогой набор; общие минимумы слотов остаются нижней границей
+            lower_bound = not groups
+            if groups:
+                tiers = {
+                    tier: max(group_tiers[tier] for group_tiers in groups.values())
+                    for tier in SOLANA_FEE_TIERS
+                }
+            fees = {
+                "tiers": tiers,
+                "unit": "SOL",
+                "live": True,
+                "details": {
+                    "window_slots": len(self.solana_fee_windows[""].window),
+                    "accounts": groups,
+                    "lower_bound": lower_bound,
+                },
+            }
+
+        load = None
+        if samples:
+            sample = samples[0]
+            current_tps = sample.get('numTransactions', 0) / sample.get('samplePeriodSecs', 1)
+            max_tps = 65000  # Теоретический максимум Solana
+            load = {
+                "load": min(100, (current_tps / max_tps) * 100),
+                "live": True,
+                "metrics": {"tps": current_tps, "slot": slot},
+            }
+
+        return fees, load
+
+    def render_load_header(self, title: str, load_percentage: float, digits: int = 0) -> str:
+        """Заголовок с прогресс-баром загрузки сети"""
+        emoji = self.get_load_emoji(load_percentage)
+        progress_bar = self.create_progress_bar(load_percentage)
+        return (
+            f"{title}\n\n"
+            f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage:.{digits}f}%\n\n"
+        )
+
+    async def fetch_ethereum_load(self) -> dict:
         """Получение загрузки сети Ethereum"""
+        load = await self.fetch_evm_load("ethereum")
+        if load is not None:
+            return load
+
         try:
             # Пытаемся получить данные о газе и блоках
-            response = requests.get(
+            response = await self.http_get(
                 "https://api.etherscan.io/api?module=gastracker&action=gasoracle",
                 timeout=10
             )
-            
+
             if response.status_code == 200:
                 data = response.json()
                 if data.get('status') == '1':
                     gas_price = float(data['result']['ProposeGasPrice'])
-                    
+
                     # Определяем загрузку на основе цены газа
                     if gas_price >= 50:
                         load_percentage = 85
@@ -161,76 +1028,72 @@ class BlockchainFeesBot:
                         load_percentage = 45
                     else:
                         load_percentage = 25
-                    
-                    emoji = self.get_load_emoji(load_percentage)
-                    progress_bar = self.create_progress_bar(load_percentage)
-                    
-                    return (
-                        f"🔵 **Ethereum Network Load**\n\n"
-                        f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage}%\n\n"
-                        f"⛽ Текущий газ: {gas_price} Gwei\n"
-                        f"📊 TPS: ~15 транзакций/сек\n"
-                        f"⏱️ Время блока: ~12 секунд\n"
-                        f"🏗️ Размер блока: ~15M gas\n\n"
-                        f"💡 Загрузка основана на цене газа"
-                    )
-            
+
+                    return {"load": load_percentage, "live": True, "metrics": {"gas_price": gas_price}}
+
         except Exception as e:
             logger.error(f"Ошибка API Ethereum load: {e}")
-        
+
         # Fallback данные
-        return (
-            f"🔵 **Ethereum Network Load**\n\n"
-            f"🟡 Загрузка сети: |███████░░░| 70%\n\n"
+        return {"load": 70, "live": False, "metrics": {}}
+
+    def render_evm_metrics(self, metrics: dict) -> str:
+        """Строки с живыми метриками EVM-сети, если они есть в снимке"""
+        text = ""
+        if "gas_price" in metrics:
+            text += f"⛽ Текущий газ: {metrics['gas_price']} Gwei\n"
+        if metrics.get("block_number"):
+            text += f"🧱 Последний блок: #{metrics['block_number']:,}\n"
+        return text
+
+    def load_basis(self, metrics: dict) -> str:
+        """Пояснение, на чем основана оценка загрузки"""
+        if "gas_used_ratio" in metrics:
+            return "Загрузка основана на заполненности последних блоков"
+        return "Загрузка основана на цене газа"
+
+    def render_ethereum_load(self, snapshot: dict) -> str:
+        """Текст загрузки сети Ethereum"""
+        text = self.render_load_header("🔵 **Ethereum Network Load**", snapshot["load"])
+        if snapshot["live"]:
+            return text + self.render_evm_metrics(snapshot["metrics"]) + (
+                f"📊 TPS: ~15 транзакций/сек\n"
+                f"⏱️ Время блока: ~12 секунд\n"
+                f"🏗️ Размер блока: ~15M gas\n\n"
+                f"💡 {self.load_basis(snapshot['metrics'])}"
+            )
+        return text + (
             f"📊 TPS: ~15 транзакций/сек\n"
             f"⏱️ Время блока: ~12 секунд\n"
             f"🏗️ Размер блока: ~15M gas\n\n"
             f"🔄 Данные API временно недоступны"
         )
 
-    async def get_solana_load(self) -> str:
+    async def fetch_solana_load(self) -> dict:
         """Получение загрузки сети Solana"""
-        try:
-            # Попытка получить TPS Solana
-            response = requests.get(
-                "https://api.mainnet-beta.solana.com",
-                json={
-                    "jsonrpc": "2.0",
-                    "id": 1,
-                    "method": "getRecentPerformanceSamples",
-                    "params": [1]
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'result' in data and len(data['result']) > 0:
-                    sample = data['result'][0]
-                    current_tps = sample.get('numTransactions', 0) / sample.get('samplePeriodSecs', 1)
-                    max_tps = 65000  # Теоретический максимум Solana
-                    
-                    load_percentage = min(100, (current_tps / max_tps) * 100)
-                    emoji = self.get_load_emoji(load_percentage)
-                    progress_bar = self.create_progress_bar(load_percentage)
-                    
-                    return (
-                        f"🟢 **Solana Network Load**\n\n"
-                        f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage:.1f}%\n\n"
-                        f"📊 Текущий TPS: {current_tps:.0f}\n"
-                        f"🚀 Максимум TPS: 65,000\n"
-                        f"⏱️ Время блока: ~400ms\n"
-                        f"🔥 Очень быстрые транзакции\n\n"
-                        f"💡 Один из самых быстрых блокчейнов"
-                    )
-            
-        except Exception as e:
-            logger.error(f"Ошибка API Solana load: {e}")
-        
+        fees, load = await self.fetch_solana_rpc()
+        if fees is not None:
+            self.publish_fee_snapshot("solana", fees)
+        if load is not None:
+            return load
+
         # Fallback данные
-        return (
-            f"🟢 **Solana Network Load**\n\n"
-            f"🟢 Загрузка сети: |████░░░░░░| 40%\n\n"
+        return {"load": 40, "live": False, "metrics": {}}
+
+    def render_solana_load(self, snapshot: dict) -> str:
+        """Текст загрузки сети Solana"""
+        if snapshot["live"]:
+            text = self.render_load_header("🟢 **Solana Network Load**", snapshot["load"], 1)
+            slot = snapshot["metrics"].get("slot")
+            return text + (f"🎰 Слот: {slot:,}\n" if slot else "") + (
+                f"📊 Текущий TPS: {snapshot['metrics']['tps']:.0f}\n"
+                f"🚀 Максимум TPS: 65,000\n"
+                f"⏱️ Время блока: ~400ms\n"
+                f"🔥 Очень быстрые транзакции\n\n"
+                f"💡 Один из самых быстрых блокчейнов"
+            )
+        text = self.render_load_header("🟢 **Solana Network Load**", snapshot["load"])
+        return text + (
             f"📊 TPS: ~2,000-3,000\n"
             f"🚀 Максимум TPS: 65,000\n"
             f"⏱️ Время блока: ~400ms\n"
@@ -238,14 +1101,14 @@ class BlockchainFeesBot:
             f"🔄 Данные API временно недоступны"
         )
 
-    async def get_bitcoin_load(self) -> str:
+    async def fetch_bitcoin_load(self) -> dict:
         """Получение загрузки сети Bitcoin"""
         try:
-            response = requests.get(
+            response = await self.http_get(
                 "https://mempool.space/api/v1/fees/mempool-blocks",
                 timeout=10
             )
-            
+
             if response.status_code == 200:
                 data = response.json()
                 if len(data) > 0:
@@ -253,28 +1116,35 @@ class BlockchainFeesBot:
                     total_size = sum(block.get('blockSize', 0) for block in data[:6])
                     avg_size = total_size / len(data[:6]) if data else 0
                     max_block_size = 1000000  # 1MB
-                    
+
                     load_percentage = min(100, (avg_size / max_block_size) * 100)
-                    emoji = self.get_load_emoji(load_percentage)
-                    progress_bar = self.create_progress_bar(load_percentage)
-                    
-                    return (
-                        f"🟠 **Bitcoin Network Load**\n\n"
-                        f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage:.1f}%\n\n"
-                        f"📊 TPS: ~7 транзакций/сек\n"
-                        f"⏱️ Время блока: ~10 минут\n"
-                        f"🏗️ Размер блока: {avg_size/1000:.0f}KB/{max_block_size/1000}KB\n"
-                        f"📦 Блоков в мемпуле: {len(data)}\n\n"
-                        f"💡 Загрузка основана на размере мемпула"
-                    )
-            
+                    return {
+                        "load": load_percentage,
+                        "live": True,
+                        "metrics": {"avg_block_size": avg_size, "mempool_blocks": len(data)},
+                    }
+
         except Exception as e:
             logger.error(f"Ошибка API Bitcoin load: {e}")
-        
+
         # Fallback данные
-        return (
-            f"🟠 **Bitcoin Network Load**\n\n"
-            f"🟡 Загрузка сети: |██████░░░░| 60%\n\n"
+        return {"load": 60, "live": False, "metrics": {}}
+
+    def render_bitcoin_load(self, snapshot: dict) -> str:
+        """Текст загрузки сети Bitcoin"""
+        if snapshot["live"]:
+            metrics = snapshot["metrics"]
+            max_block_size = 1000000  # 1MB
+            text = self.render_load_header("🟠 **Bitcoin Network Load**", snapshot["load"], 1)
+            return text + (
+                f"📊 TPS: ~7 транзакций/сек\n"
+                f"⏱️ Время блока: ~10 минут\n"
+                f"🏗️ Размер блока: {metrics['avg_block_size']/1000:.0f}KB/{max_block_size/1000}KB\n"
+                f"📦 Блоков в мемпуле: {metrics['mempool_blocks']}\n\n"
+                f"💡 Загрузка основана на размере мемпула"
+            )
+        text = self.render_load_header("🟠 **Bitcoin Network Load**", snapshot["load"])
+        return text + (
             f"📊 TPS: ~7 транзакций/сек\n"
             f"⏱️ Время блока: ~10 минут\n"
             f"🏗️ Размер блока: ~800KB/1MB\n"
@@ -282,53 +1152,39 @@ class BlockchainFeesBot:
             f"🔄 Данные API временно недоступны"
         )
 
-    async def get_bsc_load(self) -> str:
+    async def fetch_bsc_load(self) -> dict:
         """Получение загрузки сети BSC"""
-        try:
-            response = requests.get(
-                "https://api.bscscan.com/api?module=proxy&action=eth_blockNumber",
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                # BSC обычно имеет стабильную загрузку
-                load_percentage = 45  # Средняя загрузка
-                emoji = self.get_load_emoji(load_percentage)
-                progress_bar = self.create_progress_bar(load_percentage)
-                
-                return (
-                    f"🟡 **BSC Network Load**\n\n"
-                    f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage}%\n\n"
-                    f"📊 TPS: ~100 транзакций/сек\n"
-                    f"⏱️ Время блока: ~3 секунды\n"
-                    f"🏗️ Размер блока: ~30M gas\n"
-                    f"💰 Низкие комиссии\n\n"
-                    f"💡 Быстрый и дешевый блокчейн"
-                )
-            
-        except Exception as e:
-            logger.error(f"Ошибка API BSC load: {e}")
-        
+        load = await self.fetch_evm_load("bsc")
+        if load is not None:
+            return load
+
         # Fallback данные
-        return (
-            f"🟡 **BSC Network Load**\n\n"
-            f"🟡 Загрузка сети: |█████░░░░░| 50%\n\n"
+        return {"load": 50, "live": False, "metrics": {}}
+
+    def render_bsc_load(self, snapshot: dict) -> str:
+        """Текст загрузки сети BSC"""
+        text = self.render_load_header("🟡 **BSC Network Load**", snapshot["load"])
+        text += self.render_evm_metrics(snapshot["metrics"]) + (
             f"📊 TPS: ~100 транзакций/сек\n"
             f"⏱️ Время блока: ~3 секунды\n"
             f"🏗️ Размер блока: ~30M gas\n"
             f"💰 Низкие комиссии\n\n"
-            f"🔄 Данные API временно недоступны"
         )
+        if snapshot["live"]:
+            return text + f"💡 Быстрый и дешевый блокчейн"
+        return text + f"🔄 Данные API временно недоступны"
 
-    async def get_polygon_load(self) -> str:
+    async def fetch_polygon_load(self) -> dict:
         """Получение загрузки сети Polygon"""
-        load_percentage = 35  # Обычно низкая загрузка
-        emoji = self.get_load_emoji(load_percentage)
-        progress_bar = self.create_progress_bar(load_percentage)
-        
-        return (
-            f"🟪 **Polygon Network Load**\n\n"
-            f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage}%\n\n"
+        load = await self.fetch_evm_load("polygon")
+        if load is not None:
+            return load
+        return {"load": 35, "live": False, "metrics": {}}  # Обычно низкая загрузка
+
+    def render_polygon_load(self, snapshot: dict) -> str:
+        """Текст загрузки сети Polygon"""
+        text = self.render_load_header("🟪 **Polygon Network Load**", snapshot["load"])
+        return text + self.render_evm_metrics(snapshot["metrics"]) + (
             f"📊 TPS: ~7,000 транзакций/сек\n"
             f"⏱️ Время блока: ~2 секунды\n"
             f"🏗️ Размер блока: ~30M gas\n"
@@ -336,15 +1192,17 @@ class BlockchainFeesBot:
             f"💡 Очень быстрые и дешевые транзакции"
         )
 
-    async def get_arbitrum_load(self) -> str:
+    async def fetch_arbitrum_load(self) -> dict:
         """Получение загрузки сети Arbitrum"""
-        load_percentage = 30  # Обычно низкая загрузка
-        emoji = self.get_load_emoji(load_percentage)
-        progress_bar = self.create_progress_bar(load_percentage)
-        
-        return (
-            f"🔷 **Arbitrum Network Load**\n\n"
-            f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage}%\n\n"
+        load = await self.fetch_evm_load("arbitrum")
+        if load is not None:
+            return load
+        return {"load": 30, "live": False, "metrics": {}}  # Обычно низкая загрузка
+
+    def render_arbitrum_load(self, snapshot: dict) -> str:
+        """Текст загрузки сети Arbitrum"""
+        text = self.render_load_header("🔷 **Arbitrum Network Load**", snapshot["load"])
+        return text + self.render_evm_metrics(snapshot["metrics"]) + (
             f"📊 TPS: ~4,000 транзакций/сек\n"
             f"⏱️ Время блока: ~1 секунда\n"
             f"🏗️ Оптимистичные роллапы\n"
@@ -352,15 +1210,13 @@ class BlockchainFeesBot:
             f"💡 Быстрые и дешевые транзакции"
         )
 
-    async def get_ton_load(self) -> str:
-        """Получение загрузки сети TON"""
-        load_percentage = 25  # Обычно низкая загрузка
-        emoji = self.get_load_emoji(load_percentage)
-        progress_bar = self.create_progress_bar(load_percentage)
-        
-        return (
-            f"🟣 **TON Network Load**\n\n"
-            f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage}%\n\n"
+    async def fetch_ton_load(self) -> dict:
+        """Загрузка сети TON"""
+        return {"load": 25, "live": False, "metrics": {}}  # Обычно низкая загрузка
+
+    def render_ton_load(self, snapshot: dict) -> str:
+        """Текст загрузки сети TON"""
+        return self.render_load_header("🟣 **TON Network Load**", snapshot["load"]) + (
             f"📊 TPS: ~1,000,000 транзакций/сек\n"
             f"⏱️ Время блока: ~5 секунд\n"
             f"🔗 Шардинг архитектура\n"
@@ -368,15 +1224,13 @@ class BlockchainFeesBot:
             f"💡 Один из самых быстрых блокчейнов"
         )
 
-    async def get_tron_load(self) -> str:
-        """Получение загрузки сети Tron"""
-        load_percentage = 40  # Средняя загрузка
-        emoji = self.get_load_emoji(load_percentage)
-        progress_bar = self.create_progress_bar(load_percentage)
-        
-        return (
-            f"🔴 **Tron Network Load**\n\n"
-            f"{emoji} Загрузка сети: |{progress_bar}| {load_percentage}%\n\n"
+    async def fetch_tron_load(self) -> dict:
+        """Загрузка сети Tron"""
+        return {"load": 40, "live": False, "metrics": {}}  # Средняя загрузка
+
+    def render_tron_load(self, snapshot: dict) -> str:
+        """Текст загрузки сети Tron"""
+        return self.render_load_header("🔴 **Tron Network Load**", snapshot["load"]) + (
             f"📊 TPS: ~2,000 транзакций/сек\n"
             f"⏱️ Время блока: ~3 секунды\n"
             f"🏗️ DPoS консенсус\n"
@@ -384,476 +1238,520 @@ class BlockchainFeesBot:
             f"💡 Популярен для DeFi и USDT"
         )
 
-    async def get_token_price(self, token_id: str) -> float:
-        """Получение цены токена через CoinGecko API"""
+    async def refresh_prices(self):
+        """Получение цен всех токенов во всех валютах одним запросом к CoinGecko"""
         try:
-            response = requests.get(
-                f"https://api.coingecko.com/api/v3/simple/price?ids={token_id}&vs_currencies=usd",
+            response = await self.http_get(
+                "https://api.coingecko.com/api/v3/simple/price",
+                params={"ids": ",".join(PRICE_TOKENS), "vs_currencies": ",".join(CURRENCY_SYMBOLS)},
                 timeout=10
             )
             data = response.json()
-            return data[token_id]['usd']
+            prices = {token_id: data[token_id] for token_id in PRICE_TOKENS if token_id in data}
+            if not prices:
+                # Например, ответ с ошибкой лимита запросов
+                raise ValueError(f"В ответе нет цен токенов: {data}")
+            self.prices = prices
+            self.prices_ts = time.time()
         except Exception as e:
-            logger.error(f"Ошибка получения цены {token_id}: {e}")
-            return None
-
-    async def get_blockchain_fees(self, blockchain: str) -> str:
+            logger.error(f"Ошибка получения цен токенов: {e}")
+            # Ожидающие блокировку не повторяют запрос сразу за неудачным
+            self.prices_retry_ts = time.time() + PRICE_RETRY_DELAY
+
+    def prices_expired(self) -> bool:
+        """Кэш цен устарел и повторный запрос после ошибки уже разрешен"""
+        now = time.time()
+        return now - self.prices_ts >= PRICE_CACHE_TTL and now >= self.prices_retry_ts
+
+    async def get_token_price(self, token_id: str, currency: str = DEFAULT_CURRENCY, stale_ok: bool = False) -> float:
+        """Получение цены токена из общего кэша цен"""
+        stale_ok = stale_ok or self.scheduler.saturated
+        if self.prices_expired() and not (self.prices and stale_ok):
+            async with self.prices_lock:
+                # Пока ждали блокировку, цены мог обновить другой обработчик
+                if self.prices_expired():
+                    await self.refresh_prices()
+        price = self.prices.get(token_id, {}).get(currency)
+        if price is None:
+            logger.error(f"Цена {token_id} в {currency} недоступна")
+        return price
+
+    def format_fiat(self, amount: float, currency: str, digits: int = 2) -> str:
+        """Форматирование суммы в фиатной валюте"""
+        symbol = CURRENCY_SYMBOLS[currency]
+        if currency == "rub":
+            return f"{amount:,.{digits}f} {symbol}"
+        return f"{symbol}{amount:,.{digits}f}"
+
+    async def get_blockchain_fees(self, blockchain: str, currency: str = DEFAULT_CURRENCY,
+                                  profile: str = DEFAULT_PROFILE, stale_ok: bool = False) -> str:
         """Получение информации о комиссиях для выбранного блокчейна"""
+        if blockchain not in self.fee_fetchers:
+            return "❌ Неизвестный блокчейн"
         try:
-            if blockchain == "ethereum":
-                return await self.get_ethereum_fees()
-            elif blockchain == "bsc":
-                return await self.get_bsc_fees()
-            elif blockchain == "bitcoin":
-                return await self.get_bitcoin_fees()
-            elif blockchain == "solana":
-                return await self.get_solana_fees()
-            elif blockchain == "ton":
-                return await self.get_ton_fees()
-            elif blockchain == "tron":
-                return await self.get_tron_fees()
-            elif blockchain == "polygon":
-                return await self.get_polygon_fees()
-            elif blockchain == "arbitrum":
-                return await self.get_arbitrum_fees()
-            else:
-                return "❌ Неизвестный блокчейн"
+            snapshot = await self.get_fee_snapshot(blockchain, stale_ok)
+            if snapshot is None:
+                return f"❌ Не удалось получить данные {CHAIN_TITLES[blockchain].split()[-1]}"
+
+            price = await self.get_token_price(FEE_TOKENS[blockchain], currency, stale_ok)
+            # Повторный рендер нужен только при новом снимке или новых ценах
+            key = (blockchain, currency, profile)
+            version = (snapshot["version"], self.prices_ts if price else None)
+            cached = self.render_cache.get(key)
+            if cached and cached[0] == version:
+                return cached[1]
+
+            text = self.fee_renderers[blockchain](snapshot, price, currency, profile)
+            self.render_cache[key] = (version, text)
+            return text
         except Exception as e:
             logger.error(f"Ошибка получения данных для {blockchain}: {e}")
             raise
 
-    async def get_ethereum_fees(self) -> str:
-        """Получение комиссий Ethereum через Etherscan API"""
+    async def get_fee_snapshot(self, blockchain: str, stale_ok: bool = False) -> dict:
+        """Снимок комиссий из кэша или свежий, если кэш устарел"""
+        snapshot = self.fee_snapshots.get(blockchain)
+        # При перегрузке или по запросу отдаем любой известный снимок, даже устаревший
+        if snapshot and (stale_ok or self.scheduler.saturated or time.time() - snapshot["ts"] < FEE_CACHE_TTL):
+            return snapshot
+
+        async with self.fee_locks[blockchain]:
+            # Пока ждали блокировку, снимок мог обновить другой обработчик
+            snapshot = self.fee_snapshots.get(blockchain)
+            if snapshot and time.time() - snapshot["ts"] < FEE_CACHE_TTL:
+                return snapshot
+
+            fresh = await self.fee_fetchers[blockchain]()
+            if fresh is None:
+                # Отдаем последний известный снимок, если источник недоступен
+                return snapshot
+            return self.publish_fee_snapshot(blockchain, fresh)
+
+    def publish_fee_snapshot(self, blockchain: str, fresh: dict) -> dict:
+        """Сохранение свежего снимка комиссий и обновление модели прогноза и сводок"""
+        ts = time.time()
+        previous = self.fee_snapshots.get(blockchain)
+        snapshot = dict(fresh, ts=ts, version=previous["version"] + 1 if previous else 1)
+        self.fee_snapshots[blockchain] = snapshot
+        if snapshot["live"]:
+            self.forecaster.observe(blockchain, snapshot["tiers"], snapshot["unit"], ts)
+            self.rollups.observe(blockchain, snapshot["tiers"], snapshot["unit"], ts)
+            self.history.add("fees", blockchain, ts, snapshot["tiers"])
+        return snapshot
+
+    async def fetch_gas_oracle(self, url: str, name: str):
+        """Получение уровней газа из API семейства Etherscan"""
         try:
-            response = requests.get(
-                "https://api.etherscan.io/api?module=gastracker&action=gasoracle",
-                timeout=10
-            )
-            data = response.json()
+            response = await self.http_get(url, timeout=10)
 
-            if data['status'] == '1':
-                safe = float(data['result']['SafeGasPrice'])
-                standard = float(data['result']['ProposeGasPrice'])
-                fast = float(data['result']['FastGasPrice'])
-
-                # Получаем цену ETH
-                eth_price = await self.get_token_price("ethereum")
-
-                # Стандартная транзакция ETH ~21000 gas
-                gas_limit = 21000
-
-                if eth_price:
-                    safe_usd = (safe * gas_limit * 0.000000001) * eth_price
-                    standard_usd = (standard * gas_limit * 0.000000001) * eth_price
-                    fast_usd = (fast * gas_limit * 0.000000001) * eth_price
-
-                    return (
-                        f"🔵 **Ethereum (ETH)**\n\n"
-                        f"⚡ Быстрая: {fast} Gwei (≈ ${fast_usd:.3f})\n"
-                        f"📊 Стандартная: {standard} Gwei (≈ ${standard_usd:.3f})\n"
-                        f"🐌 Безопасная: {safe} Gwei (≈ ${safe_usd:.3f})\n\n"
-                        f"💡 Расчет для простого перевода (21k gas)\n"
-                        f"📈 Курс ETH: ${eth_price:.2f}"
-                    )
-                else:
-                    return (
-                        f"🔵 **Ethereum (ETH)**\n\n"
-                        f"⚡ Быстрая: {fast} Gwei\n"
-                        f"📊 Стандартная: {standard} Gwei\n"
-                        f"🐌 Безопасная: {safe} Gwei\n\n"
-                        f"💡 1 Gwei = 0.000000001 ETH"
-                    )
+            if response.status_code == 200:
+                data = response.json()
+
+                if data.get('status') == '1' and 'result' in data:
+                    return {
+                        "fast": float(data['result']['FastGasPrice']),
+                        "standard": float(data['result']['ProposeGasPrice']),
+                        "slow": float(data['result']['SafeGasPrice']),
+                    }
+                logger.warning(f"Неожиданный ответ API {name}: {data}")
             else:
-                return "❌ Не удалось получить данные Ethereum"
+                logger.warning(f"HTTP {response.status_code} от API {name}")
+
+        except requests.RequestException as e:
+            logger.error(f"Ошибка запроса к API {name}: {e}")
         except Exception as e:
-            logger.error(f"Ошибка API Ethereum: {e}")
-            return "❌ Ошибка получения данных Ethereum"
+            logger.error(f"Неожиданная ошибка API {name}: {e}")
+        return None
 
-    async def get_bsc_fees(self) -> str:
-        """Получение комиссий BSC через BscScan API"""
-        try:
-            response = requests.get(
-                "https://api.bscscan.com/api?module=gastracker&action=gasoracle",
-                timeout=10
-            )
-            data = response.json()
+    async def fetch_ethereum_fees(self) -> dict:
+        """Получение комиссий Ethereum через JSON-RPC, запасной источник — Etherscan API"""
+        fees = await self.fetch_evm_fees("ethereum")
+        if fees is not None:
+            return fees
 
-            if data['status'] == '1':
-                safe = float(data['result']['SafeGasPrice'])
-                standard = float(data['result']['ProposeGasPrice'])
-                fast = float(data['result']['FastGasPrice'])
-
-                # Получаем цену BNB
-                bnb_price = await self.get_token_price("binancecoin")
-
-                # Стандартная транзакция BSC ~21000 gas
-                gas_limit = 21000
-
-                if bnb_price:
-                    safe_usd = (safe * gas_limit * 0.000000001) * bnb_price
-                    standard_usd = (standard * gas_limit * 0.000000001) * bnb_price
-                    fast_usd = (fast * gas_limit * 0.000000001) * bnb_price
-
-                    return (
-                        f"🟡 **BSC (BNB)**\n\n"
-                        f"⚡ Быстрая: {fast} Gwei (≈ ${fast_usd:.4f})\n"
-                        f"📊 Стандартная: {standard} Gwei (≈ ${standard_usd:.4f})\n"
-                        f"🐌 Безопасная: {safe} Gwei (≈ ${safe_usd:.4f})\n\n"
-                        f"💡 Расчет для простого перевода (21k gas)\n"
-                        f"📈 Курс BNB: ${bnb_price:.2f}"
-                    )
-                else:
-                    return (
-                        f"🟡 **BSC (BNB)**\n\n"
-                        f"⚡ Быстрая: {fast} Gwei\n"
-                        f"📊 Стандартная: {standard} Gwei\n"
-                        f"🐌 Безопасная: {safe} Gwei\n\n"
-                        f"💡 Обычно 5-10 Gwei для BSC"
-                    )
-            else:
-                return "❌ Не удалось получить данные BSC"
-        except Exception as e:
-            logger.error(f"Ошибка API BSC: {e}")
-            return "❌ Ошибка получения данных BSC"
+        tiers = await self.fetch_gas_oracle(
+            "https://api.etherscan.io/api?module=gastracker&action=gasoracle", "Ethereum"
+        )
+        if tiers is None:
+            return None
+        return {"tiers": tiers, "unit": "Gwei", "live": True}
+
+    async def fetch_bsc_fees(self) -> dict:
+        """Получение комиссий BSC через JSON-RPC, запасной источник — BscScan API"""
+        fees = await self.fetch_evm_fees("bsc")
+        if fees is not None:
+            return fees
+
+        tiers = await self.fetch_gas_oracle(
+            "https://api.bscscan.com/api?module=gastracker&action=gasoracle", "BSC"
+        )
+        if tiers is None:
+            return None
+        return {"tiers": tiers, "unit": "Gwei", "live": True}
 
-    async def get_bitcoin_fees(self) -> str:
+    async def fetch_bitcoin_fees(self) -> dict:
         """Получение комиссий Bitcoin через Mempool.space API"""
         try:
-            response = requests.get(
+            response = await self.http_get(
                 "https://mempool.space/api/v1/fees/recommended",
                 timeout=10
             )
             data = response.json()
 
-            fast = data['fastestFee']
-            half_hour = data['halfHourFee']
-            hour = data['hourFee']
+            tiers = {
+                "fast": data['fastestFee'],
+                "standard": data['halfHourFee'],
+                "slow": data['hourFee'],
+            }
+            return {"tiers": tiers, "unit": "sat/vB", "live": True}
+        except Exception as e:
+            logger.error(f"Ошибка API Bitcoin: {e}")
+            return None
 
-            # Получаем цену BTC
-            btc_price = await self.get_token_price("bitcoin")
+    async def fetch_solana_fees(self) -> dict:
+        """Комиссии Solana: базовая плата и перцентили приоритетных комиссий по недавним слотам"""
+        fees, load = await self.fetch_solana_rpc()
+        if load is not None:
+            self.publish_load_snapshot("solana", load)
+        if fees is not None:
+            return fees
+
+        # Без данных узла показываем только базовую плату
+        return {"tiers": {"standard": 0.000005}, "unit": "SOL", "live": False}
+
+    async def fetch_ton_fees(self) -> dict:
+        """Типичные комиссии TON в зависимости от сложности транзакции"""
+        return {"tiers": {"fast": 0.02, "standard": 0.01, "slow": 0.005}, "unit": "TON", "live": False}
+
+    async def fetch_tron_fees(self) -> dict:
+        """Типичные комиссии Tron: bandwidth для переводов и energy для контрактов"""
+        return {"tiers": {"transfer": 0.001, "contract": 15}, "unit": "TRX", "live": False}
+
+    async def fetch_polygon_fees(self) -> dict:
+        """Получение комиссий Polygon через JSON-RPC, запасной источник — PolygonScan API"""
+        fees = await self.fetch_evm_fees("polygon")
+        if fees is not None:
+            return fees
+
+        tiers = await self.fetch_gas_oracle(
+            "https://api.polygonscan.com/api?module=gastracker&action=gasoracle", "Polygon"
+        )
+        # Проверяем, что значения не равны нулю
+        if tiers and not any(tiers.values()):
+            logger.warning("API Polygon вернул нулевые значения")
+            tiers = None
+        if tiers is None:
+            # Типичные комиссии Polygon в Gwei
+            return {"tiers": {"fast": 80, "standard": 50, "slow": 30}, "unit": "Gwei", "live": False}
+        return {"tiers": tiers, "unit": "Gwei", "live": True}
 
-            # Средняя транзакция Bitcoin ~250 байт
-            tx_size = 250
+    async def fetch_arbitrum_fees(self) -> dict:
+        """Получение комиссий Arbitrum через JSON-RPC, запасной источник — Arbiscan API"""
+        fees = await self.fetch_evm_fees("arbitrum")
+        if fees is not None:
+            return fees
 
-            if btc_price:
-                fast_btc = fast * tx_size * 0.00000001
-                half_hour_btc = half_hour * tx_size * 0.00000001
-                hour_btc = hour * tx_size * 0.00000001
+        tiers = await self.fetch_gas_oracle(
+            "https://api.arbiscan.io/api?module=gastracker&action=gasoracle", "Arbitrum"
+        )
+        if tiers is None:
+            # Типичный диапазон комиссий Arbitrum в Gwei
+            return {"tiers": {"standard": 2.0, "slow": 0.1}, "unit": "Gwei", "live": False}
+        return {"tiers": tiers, "unit": "Gwei", "live": True}
+
+    def gas_to_fiat(self, gwei: float, gas_limit: int, price: float) -> float:
+        """Стоимость транзакции в фиатной валюте по цене газа в Gwei"""
+        return (gwei * gas_limit * 0.000000001) * price
+
+    def render_ethereum_fees(self, snapshot: dict, price: float, currency: str, profile: str) -> str:
+        """Текст комиссий Ethereum"""
+        tiers = snapshot["tiers"]
+        fast, standard, safe = tiers["fast"], tiers["standard"], tiers["slow"]
+        gas_limit = TX_PROFILES[profile]["gas"]
+
+        if price:
+            return (
+                f"🔵 **Ethereum (ETH)**\n\n"
+                f"⚡ Быстрая: {fast} Gwei (≈ {self.format_fiat(self.gas_to_fiat(fast, gas_limit, price), currency, 3)})\n"
+                f"📊 Стандартная: {standard} Gwei (≈ {self.format_fiat(self.gas_to_fiat(standard, gas_limit, price), currency, 3)})\n"
+                f"🐌 Безопасная: {safe} Gwei (≈ {self.format_fiat(self.gas_to_fiat(safe, gas_limit, price), currency, 3)})\n\n"
+                f"💡 Расчет для {TX_PROFILES[profile]['title']} ({gas_limit // 1000}k gas)\n"
+                f"📈 Курс ETH: {self.format_fiat(price, currency, 2)}"
+            )
+        return (
+            f"🔵 **Ethereum (ETH)**\n\n"
+            f"⚡ Быстрая: {fast} Gwei\n"
+            f"📊 Стандартная: {standard} Gwei\n"
+            f"🐌 Безопасная: {safe} Gwei\n\n"
+            f"💡 1 Gwei = 0.000000001 ETH"
+        )
 
-                fast_usd = fast_btc * btc_price
-                half_hour_usd = half_hour_btc * btc_price
-                hour_usd = hour_btc * btc_price
+    def render_bsc_fees(self, snapshot: dict, price: float, currency: str, profile: str) -> str:
+        """Текст комиссий BSC"""
+        tiers = snapshot["tiers"]
+        fast, standard, safe = tiers["fast"], tiers["standard"], tiers["slow"]
+        gas_limit = TX_PROFILES[profile]["gas"]
 
-                return (
-                    f"🟠 **Bitcoin (BTC)**\n\n"
-                    f"⚡ Быстрая (~10 мин): {fast} sat/vB (≈ ${fast_usd:.2f})\n"
-                    f"📊 Средняя (~30 мин): {half_hour} sat/vB (≈ ${half_hour_usd:.2f})\n"
-                    f"🐌 Медленная (~60 мин): {hour} sat/vB (≈ ${hour_usd:.2f})\n\n"
-                    f"💡 Расчет для стандартной транзакции (250 bytes)\n"
-                    f"📈 Курс BTC: ${btc_price:,.2f}"
-                )
-            else:
-                return (
-                    f"🟠 **Bitcoin (BTC)**\n\n"
-                    f"⚡ Быстрая (~10 мин): {fast} sat/vB\n"
-                    f"📊 Средняя (~30 мин): {half_hour} sat/vB\n"
-                    f"🐌 Медленная (~60 мин): {hour} sat/vB\n\n"
-                    f"💡 sat/vB = сатоши за виртуальный байт"
-                )
-        except Exception as e:
-            logger.error(f"Ошибка API Bitcoin: {e}")
-            return "❌ Ошибка получения данных Bitcoin"
+        if price:
+            return (
+                f"🟡 **BSC (BNB)**\n\n"
+                f"⚡ Быстрая: {fast} Gwei (≈ {self.format_fiat(self.gas_to_fiat(fast, gas_limit, price), currency, 4)})\n"
+                f"📊 Стандартная: {standard} Gwei (≈ {self.format_fiat(self.gas_to_fiat(standard, gas_limit, price), currency, 4)})\n"
+                f"🐌 Безопасная: {safe} Gwei (≈ {self.format_fiat(self.gas_to_fiat(safe, gas_limit, price), currency, 4)})\n\n"
+                f"💡 Расчет для {TX_PROFILES[profile]['title']} ({gas_limit // 1000}k gas)\n"
+                f"📈 Курс BNB: {self.format_fiat(price, currency, 2)}"
+            )
+        return (
+            f"🟡 **BSC (BNB)**\n\n"
+            f"⚡ Быстрая: {fast} Gwei\n"
+            f"📊 Стандартная: {standard} Gwei\n"
+            f"🐌 Безопасная: {safe} Gwei\n\n"
+            f"💡 Обычно 5-10 Gwei для BSC"
+        )
 
-    async def get_solana_fees(self) -> str:
-        """Получение информации о комиссиях Solana"""
-        try:
-            # Получаем курс SOL
-            sol_price = await self.get_token_price("solana")
+    def render_bitcoin_fees(self, snapshot: dict, price: float, currency: str, profile: str) -> str:
+        """Текст комиссий Bitcoin"""
+        tiers = snapshot["tiers"]
+        fast, half_hour, hour = tiers["fast"], tiers["standard"], tiers["slow"]
 
-            fee_sol = 0.000005
+        # Средняя транзакция Bitcoin ~250 байт
+        tx_size = 250
 
-            if sol_price:
-                fee_usd = fee_sol * sol_price
+        if price:
+            fast_fiat = fast * tx_size * 0.00000001 * price
+            half_hour_fiat = half_hour * tx_size * 0.00000001 * price
+            hour_fiat = hour * tx_size * 0.00000001 * price
 
+            return (
+                f"🟠 **Bitcoin (BTC)**\n\n"
+                f"⚡ Быстрая (~10 мин): {fast} sat/vB (≈ {self.format_fiat(fast_fiat, currency)})\n"
+                f"📊 Средняя (~30 мин): {half_hour} sat/vB (≈ {self.format_fiat(half_hour_fiat, currency)})\n"
+                f"🐌 Медленная (~60 мин): {hour} sat/vB (≈ {self.format_fiat(hour_fiat, currency)})\n\n"
+                f"💡 Расчет для стандартной транзакции (250 bytes)\n"
+                f"📈 Курс BTC: {self.format_fiat(price, currency)}"
+            )
+        return (
+            f"🟠 **Bitcoin (BTC)**\n\n"
+            f"⚡ Быстрая (~10 мин): {fast} sat/vB\n"
+            f"📊 Средняя (~30 мин): {half_hour} sat/vB\n"
+            f"🐌 Медленная (~60 мин): {hour} sat/vB\n\n"
+            f"💡 sat/vB = сатоши за виртуальный байт"
+        )
+
+    def render_solana_fees(self, snapshot: dict, price: float, currency: str, profile: str) -> str:
+        """Текст комиссий Solana"""
+        tiers = snapshot["tiers"]
+
+        if not snapshot["live"]:
+            fee_sol = tiers["standard"]
+            if price:
                 return (
                     f"🟢 **Solana (SOL)**\n\n"
-                    f"💰 Стандартная комиссия: {fee_sol:.6f} SOL (≈ ${fee_usd:.6f})\n"
-                    f"📈 Курс SOL: ${sol_price:.2f}\n\n"
-                    f"💡 Фиксированная комиссия для большинства транзакций"
-                )
-            else:
-                return (
-                    f"🟢 **Solana (SOL)**\n\n"
-                    f"💰 Стандартная комиссия: {fee_sol:.6f} SOL\n\n"
+                    f"💰 Стандартная комиссия: {fee_sol:.6f} SOL (≈ {self.format_fiat(fee_sol * price, currency, 6)})\n"
+                    f"📈 Курс SOL: {self.format_fiat(price, currency)}\n\n"
                     f"💡 Фиксированная комиссия для большинства транзакций"
                 )
-        except Exception as e:
-            logger.error(f"Ошибка получения данных Solana: {e}")
             return (
                 f"🟢 **Solana (SOL)**\n\n"
-                f"💰 Стандартная комиссия: 0.000005 SOL\n\n"
+                f"💰 Стандартная комиссия: {fee_sol:.6f} SOL\n\n"
                 f"💡 Фиксированная комиссия для большинства транзакций"
             )
 
-    async def get_ton_fees(self) -> str:
-        """Получение комиссий TON через Tonapi"""
-        try:
-            # Получаем цену TON
-            ton_price = await self.get_token_price("the-open-network")
-
-            fee_low = 0.005
-            fee_standard = 0.01
-            fee_high = 0.02
+        lines = ["🟢 **Solana (SOL)**\n"]
+        for name in ("urgent", "fast", "standard", "slow"):
+            fee_sol = tiers[name]
+            line = f"{TIER_TITLES[name]} (p{SOLANA_FEE_TIERS[name] * 100:.0f}): {fee_sol:.6f} SOL"
+            if price:
+                line += f" (≈ {self.format_fiat(fee_sol * price, currency, 6)})"
+            lines.append(line)
+
+        accounts = snapshot.get("details", {}).get("accounts")
+        if accounts:
+            lines.append("\n🔥 Горячие аккаунты (p50 / p95):")
+            for name, group_tiers in accounts.items():
+                lines.append(f"• {name}: {group_tiers['standard']:.6f} / {group_tiers['urgent']:.6f} SOL")
+
+        lines.append("")
+        if price:
+            lines.append(f"📈 Курс SOL: {self.format_fiat(price, currency)}")
+        lines.append(
+            f"💡 Базовая плата + приоритетная комиссия за {SOLANA_COMPUTE_UNITS // 1000}k CU "
+            f"по {snapshot['details']['window_slots']} недавним слотам"
+        )
+        if snapshot["details"].get("lower_bound"):
+            lines.append("⚠️ Горячие аккаунты не заданы: уровни по минимумам слотов — нижняя граница")
+        return "\n".join(lines)
 
-            if ton_price:
-                fee_low_usd = fee_low * ton_price
-                fee_standard_usd = fee_standard * ton_price
-                fee_high_usd = fee_high * ton_price
+    def render_ton_fees(self, snapshot: dict, price: float, currency: str, profile: str) -> str:
+        """Текст комиссий TON"""
+        tiers = snapshot["tiers"]
+        fee_low, fee_standard, fee_high = tiers["slow"], tiers["standard"], tiers["fast"]
 
-                return (
-                    f"🟣 **TON**\n\n"
-                    f"💰 Простая транзакция: ~{fee_low} TON (≈ ${fee_low_usd:.4f})\n"
-                    f"📊 Стандартная: ~{fee_standard} TON (≈ ${fee_standard_usd:.4f})\n"
-                    f"⚡ Сложная транзакция: ~{fee_high} TON (≈ ${fee_high_usd:.4f})\n\n"
-                    f"📈 Курс TON: ${ton_price:.3f}\n"
-                    f"💡 Комиссия зависит от сложности транзакции"
-                )
-            else:
-                return (
-                    f"🟣 **TON**\n\n"
-                    f"💰 Простая транзакция: ~0.005 TON\n"
-                    f"📊 Стандартная: ~0.01 TON\n"
-                    f"⚡ Сложная транзакция: ~0.02 TON\n\n"
-                    f"💡 Очень низкие комиссии за счет архитектуры"
-                )
-        except Exception as e:
-            logger.error(f"Ошибка API TON: {e}")
+        if price:
             return (
                 f"🟣 **TON**\n\n"
-                f"💰 Стандартная комиссия: ~0.01 TON\n"
-                f"📊 Комиссия зависит от сложности транзакции\n\n"
-                f"💡 Очень низкие комиссии за счет архитектуры"
+                f"💰 Простая транзакция: ~{fee_low} TON (≈ {self.format_fiat(fee_low * price, currency, 4)})\n"
+                f"📊 Стандартная: ~{fee_standard} TON (≈ {self.format_fiat(fee_standard * price, currency, 4)})\n"
+                f"⚡ Сложная транзакция: ~{fee_high} TON (≈ {self.format_fiat(fee_high * price, currency, 4)})\n\n"
+                f"📈 Курс TON: {self.format_fiat(price, currency, 3)}\n"
+                f"💡 Комиссия зависит от сложности транзакции"
             )
+        return (
+            f"🟣 **TON**\n\n"
+            f"💰 Простая транзакция: ~{fee_low} TON\n"
+            f"📊 Стандартная: ~{fee_standard} TON\n"
+            f"⚡ Сложная транзакция: ~{fee_high} TON\n\n"
+            f"💡 Очень низкие комиссии за счет архитектуры"
+        )
 
-    async def get_tron_fees(self) -> str:
-        """Получение информации о комиссиях Tron"""
-        try:
-            # Получаем курс TRX
-            trx_price = await self.get_token_price("tron")
-
-            bandwidth_fee = 0.001
-            energy_fee = 15
-
-            if trx_price:
-                bandwidth_usd = bandwidth_fee * trx_price
-                energy_usd = energy_fee * trx_price
+    def render_tron_fees(self, snapshot: dict, price: float, currency: str, profile: str) -> str:
+        """Текст комиссий Tron"""
+        bandwidth_fee = snapshot["tiers"]["transfer"]
+        energy_fee = snapshot["tiers"]["contract"]
 
-                return (
-                    f"🔴 **Tron (TRX)**\n\n"
-                    f"📡 Обычный перевод: {bandwidth_fee} TRX (≈ ${bandwidth_usd:.6f})\n"
-                    f"⚡ Смарт-контракт: ~{energy_fee} TRX (≈ ${energy_usd:.4f})\n\n"
-                    f"📈 Курс TRX: ${trx_price:.4f}\n"
-                    f"💡 Обычные переводы очень дешевые"
-                )
-            else:
-                return (
-                    f"🔴 **Tron (TRX)**\n\n"
-                    f"📡 Обычный перевод: 0.001 TRX\n"
-                    f"⚡ Смарт-контракт: ~15 TRX\n\n"
-                    f"💡 Обычные переводы: очень дешево"
-                )
-        except Exception as e:
-            logger.error(f"Ошибка получения данных Tron: {e}")
+        if price:
             return (
                 f"🔴 **Tron (TRX)**\n\n"
-                f"📡 Обычный перевод: 0.001 TRX\n"
-                f"⚡ Смарт-контракт: ~15 TRX\n\n"
-                f"💡 Обычные переводы: очень дешево"
+                f"📡 Обычный перевод: {bandwidth_fee} TRX (≈ {self.format_fiat(bandwidth_fee * price, currency, 6)})\n"
+                f"⚡ Смарт-контракт: ~{energy_fee} TRX (≈ {self.format_fiat(energy_fee * price, currency, 4)})\n\n"
+                f"📈 Курс TRX: {self.format_fiat(price, currency, 4)}\n"
+                f"💡 Обычные переводы очень дешевые"
             )
+        return (
+            f"🔴 **Tron (TRX)**\n\n"
+            f"📡 Обычный перевод: {bandwidth_fee} TRX\n"
+            f"⚡ Смарт-контракт: ~{energy_fee} TRX\n\n"
+            f"💡 Обычные переводы: очень дешево"
+        )
 
-    async def get_polygon_fees(self) -> str:
-        """Получение комиссий Polygon через PolygonScan API"""
-        try:
-            response = requests.get(
-                "https://api.polygonscan.com/api?module=gastracker&action=gasoracle",
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('status') == '1' and 'result' in data:
-                    safe = float(data['result']['SafeGasPrice'])
-                    standard = float(data['result']['ProposeGasPrice'])
-                    fast = float(data['result']['FastGasPrice'])
-                    
-                    # Проверяем, что значения не равны нулю
-                    if safe == 0 and standard == 0 and fast == 0:
-                        logger.warning("API Polygon вернул нулевые значения")
-                    else:
-                        # Получаем цену MATIC
-                        matic_price = await self.get_token_price("matic-network")
-                        gas_limit = 21000
-
-                        if matic_price:
-                            safe_usd = (safe * gas_limit * 0.000000001) * matic_price
-                            standard_usd = (standard * gas_limit * 0.000000001) * matic_price
-                            fast_usd = (fast * gas_limit * 0.000000001) * matic_price
-
-                            return (
-                                f"🟪 **Polygon (MATIC)**\n\n"
-                                f"⚡ Быстрая: {fast} Gwei (≈ ${fast_usd:.5f})\n"
-                                f"📊 Стандартная: {standard} Gwei (≈ ${standard_usd:.5f})\n"
-                                f"🐌 Безопасная: {safe} Gwei (≈ ${safe_usd:.5f})\n\n"
-                                f"💡 Расчет для простого перевода (21k gas)\n"
-                                f"📈 Курс MATIC: ${matic_price:.4f}"
-                            )
-                        else:
-                            return (
-                                f"🟪 **Polygon (MATIC)**\n\n"
-                                f"⚡ Быстрая: {fast} Gwei\n"
-                                f"📊 Стандартная: {standard} Gwei\n"
-                                f"🐌 Безопасная: {safe} Gwei\n\n"
-                                f"💡 Комиссии Polygon обычно очень низкие"
-                            )
-                else:
-                    logger.warning(f"Неожиданный ответ API Polygon: {data}")
-            else:
-                logger.warning(f"HTTP {response.status_code} от API Polygon")
-                
-        except requests.RequestException as e:
-            logger.error(f"Ошибка запроса к API Polygon: {e}")
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка API Polygon: {e}")
+    def render_polygon_fees(self, snapshot: dict, price: float, currency: str, profile: str) -> str:
+        """Текст комиссий Polygon"""
+        tiers = snapshot["tiers"]
+        fast, standard, safe = tiers["fast"], tiers["standard"], tiers["slow"]
+        gas_limit = TX_PROFILES[profile]["gas"]
+        # Для типичных значений показываем приблизительные цифры
+        approx = "" if snapshot["live"] else "~"
 
-        # Возвращаем фиксированную информацию при любой ошибке или нулевых значениях
-        matic_price = await self.get_token_price("matic-network")
-        
-        if matic_price:
-            # Типичные комиссии Polygon в Gwei
-            safe_gwei = 30
-            standard_gwei = 50
-            fast_gwei = 80
-            gas_limit = 21000
-            
-            safe_usd = (safe_gwei * gas_limit * 0.000000001) * matic_price
-            standard_usd = (standard_gwei * gas_limit * 0.000000001) * matic_price
-            fast_usd = (fast_gwei * gas_limit * 0.000000001) * matic_price
-            
-            return (
+        if price:
+            text = (
                 f"🟪 **Polygon (MATIC)**\n\n"
-                f"⚡ Быстрая: ~{fast_gwei} Gwei (≈ ${fast_usd:.5f})\n"
-                f"📊 Стандартная: ~{standard_gwei} Gwei (≈ ${standard_usd:.5f})\n"
-                f"🐌 Безопасная: ~{safe_gwei} Gwei (≈ ${safe_usd:.5f})\n\n"
-                f"💡 Типичные значения для Polygon\n"
-                f"📈 Курс MATIC: ${matic_price:.4f}\n"
-                f"🔄 Данные API временно недоступны"
+                f"⚡ Быстрая: {approx}{fast} Gwei (≈ {self.format_fiat(self.gas_to_fiat(fast, gas_limit, price), currency, 5)})\n"
+                f"📊 Стандартная: {approx}{standard} Gwei (≈ {self.format_fiat(self.gas_to_fiat(standard, gas_limit, price), currency, 5)})\n"
+                f"🐌 Безопасная: {approx}{safe} Gwei (≈ {self.format_fiat(self.gas_to_fiat(safe, gas_limit, price), currency, 5)})\n\n"
             )
-        else:
-            return (
-                f"🟪 **Polygon (MATIC)**\n\n"
-                f"⚡ Быстрая: ~80 Gwei\n"
-                f"📊 Стандартная: ~50 Gwei\n"
-                f"🐌 Безопасная: ~30 Gwei\n\n"
-                f"💡 Типичные комиссии намного дешевле Ethereum\n"
+            if snapshot["live"]:
+                return text + (
+                    f"💡 Расчет для {TX_PROFILES[profile]['title']} ({gas_limit // 1000}k gas)\n"
+                    f"📈 Курс MATIC: {self.format_fiat(price, currency, 4)}"
+                )
+            return text + (
+                f"💡 Типичные значения для Polygon\n"
+                f"📈 Курс MATIC: {self.format_fiat(price, currency, 4)}\n"
                 f"🔄 Данные API временно недоступны"
             )
 
-    async def get_arbitrum_fees(self) -> str:
-        """Получение комиссий Arbitrum через Arbiscan API"""
-        try:
-            response = requests.get(
-                "https://api.arbiscan.io/api?module=gastracker&action=gasoracle",
-                timeout=10
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-
-                if data.get('status') == '1' and 'result' in data:
-                    safe = int(data['result']['SafeGasPrice'])
-                    standard = int(data['result']['ProposeGasPrice'])
-                    fast = int(data['result']['FastGasPrice'])
-
-                    # Получаем цену ETH
-                    eth_price = await self.get_token_price("ethereum")
-
-                    # Стандартная транзакция ~21000 gas
-                    gas_limit = 21000
-
-                    if eth_price:
-                        safe_usd = (safe * gas_limit * 0.000000001) * eth_price
-                        standard_usd = (standard * gas_limit * 0.000000001) * eth_price
-                        fast_usd = (fast * gas_limit * 0.000000001) * eth_price
-
-                        return (
-                            f"🔷 **Arbitrum (ETH)**\n\n"
-                            f"⚡ Быстрая: {fast} Gwei (≈ ${fast_usd:.5f})\n"
-                            f"📊 Стандартная: {standard} Gwei (≈ ${standard_usd:.5f})\n"
-                            f"🐌 Безопасная: {safe} Gwei (≈ ${safe_usd:.5f})\n\n"
-                            f"💡 Расчет для простого перевода (21k gas)\n"
-                            f"📈 Курс ETH: ${eth_price:.2f}"
-                        )
-                    else:
-                        return (
-                            f"🔷 **Arbitrum (ETH)**\n\n"
-                            f"⚡ Быстрая: {fast} Gwei\n"
-                            f"📊 Стандартная: {standard} Gwei\n"
-                            f"🐌 Безопасная: {safe} Gwei\n\n"
-                            f"💡 L2 решение с низкими комиссиями"
-                        )
-                else:
-                    logger.warning(f"Неожиданный ответ API Arbitrum: {data}")
-            else:
-                logger.warning(f"HTTP {response.status_code} от API Arbitrum")
-
-        except requests.RequestException as e:
-            logger.error(f"Ошибка запроса к API Arbitrum: {e}")
-        except Exception as e:
-            logger.error(f"Неожиданная ошибка API Arbitrum: {e}")
-
-        # Возвращаем фиксированную информацию при любой ошибке
-        eth_price = await self.get_token_price("ethereum")
-
-        if eth_price:
-            # Типичные комиссии Arbitrum
-            low_gwei = 0.1
-            high_gwei = 2.0
-            gas_limit = 21000
+        text = (
+            f"🟪 **Polygon (MATIC)**\n\n"
+            f"⚡ Быстрая: {approx}{fast} Gwei\n"
+            f"📊 Стандартная: {approx}{standard} Gwei\n"
+            f"🐌 Безопасная: {approx}{safe} Gwei\n\n"
+        )
+        if snapshot["live"]:
+            return text + f"💡 Комиссии Polygon обычно очень низкие"
+        return text + (
+            f"💡 Типичные комиссии намного дешевле Ethereum\n"
+            f"🔄 Данные API временно недоступны"
+        )
 
-            low_usd = (low_gwei * gas_limit * 0.000000001) * eth_price
-            high_usd = (high_gwei * gas_limit * 0.000000001) * eth_price
+    def render_arbitrum_fees(self, snapshot: dict, price: float, currency: str, profile: str) -> str:
+        """Текст комиссий Arbitrum"""
+        tiers = snapshot["tiers"]
+        gas_limit = TX_PROFILES[profile]["gas"]
 
+        if not snapshot["live"]:
+            low_gwei, high_gwei = tiers["slow"], tiers["standard"]
+            if price:
+                low_fiat = self.gas_to_fiat(low_gwei, gas_limit, price)
+                high_fiat = self.gas_to_fiat(high_gwei, gas_limit, price)
+                return (
+                    f"🔷 **Arbitrum (ETH)**\n\n"
+                    f"💰 Типичная комиссия: {low_gwei}-{high_gwei} Gwei "
+                    f"(≈ {self.format_fiat(low_fiat, currency, 5)}-{self.format_fiat(high_fiat, currency, 4)})\n"
+                    f"📊 Очень низкие комиссии благодаря L2\n"
+                    f"⚡ Быстрые транзакции (~1-2 сек)\n\n"
+                    f"📈 Курс ETH: {self.format_fiat(price, currency)}\n"
+                    f"💡 Layer 2 решение для Ethereum\n"
+                    f"🔄 Данные API временно недоступны"
+                )
             return (
                 f"🔷 **Arbitrum (ETH)**\n\n"
-                f"💰 Типичная комиссия: 0.1-2 Gwei (≈ ${low_usd:.5f}-${high_usd:.4f})\n"
+                f"💰 Типичная комиссия: {low_gwei}-{high_gwei} Gwei\n"
                 f"📊 Очень низкие комиссии благодаря L2\n"
                 f"⚡ Быстрые транзакции (~1-2 сек)\n\n"
-                f"📈 Курс ETH: ${eth_price:.2f}\n"
                 f"💡 Layer 2 решение для Ethereum\n"
                 f"🔄 Данные API временно недоступны"
             )
-        else:
+
+        fast, standard, safe = tiers["fast"], tiers["standard"], tiers["slow"]
+        if price:
             return (
                 f"🔷 **Arbitrum (ETH)**\n\n"
-                f"💰 Типичная комиссия: 0.1-2 Gwei\n"
-                f"📊 Очень низкие комиссии благодаря L2\n"
-                f"⚡ Быстрые транзакции (~1-2 сек)\n\n"
-                f"💡 Layer 2 решение для Ethereum\n"
-                f"🔄 Данные API временно недоступны"
+                f"⚡ Быстрая: {fast} Gwei (≈ {self.format_fiat(self.gas_to_fiat(fast, gas_limit, price), currency, 5)})\n"
+                f"📊 Стандартная: {standard} Gwei (≈ {self.format_fiat(self.gas_to_fiat(standard, gas_limit, price), currency, 5)})\n"
+                f"🐌 Безопасная: {safe} Gwei (≈ {self.format_fiat(self.gas_to_fiat(safe, gas_limit, price), currency, 5)})\n\n"
+                f"💡 Расчет для {TX_PROFILES[profile]['title']} ({gas_limit // 1000}k gas)\n"
+                f"📈 Курс ETH: {self.format_fiat(price, currency)}"
             )
+        return (
+            f"🔷 **Arbitrum (ETH)**\n\n"
+            f"⚡ Быстрая: {fast} Gwei\n"
+            f"📊 Стандартная: {standard} Gwei\n"
+            f"🐌 Безопасная: {safe} Gwei\n\n"
+            f"💡 L2 решение с низкими комиссиями"
+        )
+
+    async def run_tenants(self):
+        """Запуск всех тенантов в одном event loop до сигнала остановки"""
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                pass
+
+        await self.startup()
+        started = []
+        try:
+            for tenant in self.tenants:
+                application = tenant.application
+                await application.initialize()
+                started.append(application)
+                await application.start()
+                await application.updater.start_polling(drop_pending_updates=True)
+                logger.info(f"Тенант {tenant.name} запущен")
+            await stop_event.wait()
+        finally:
+            for application in reversed(started):
+                if application.updater.running:
+                    await application.updater.stop()
+                if application.running:
+                    await application.stop()
+                await application.shutdown()
+            await self.shutdown()
 
     def run(self):
         """Запуск бота"""
-        logger.info("Запуск Telegram бота...")
-        self.application.run_polling(drop_pending_updates=True)
+        logger.info(f"Запуск Telegram бота ({len(self.tenants)} тенант(ов))...")
+        asyncio.run(self.run_tenants())
 
 def main():
-    # Запускаем keep_alive в отдельном потоке
-    threading.Thread(target=keep_alive, daemon=True).start()
-
-    # Создаем и запускаем бота
+    # Создаем бота
     bot = BlockchainFeesBot()
+
+    # Запускаем keep_alive с JSON API в отдельном потоке
+    threading.Thread(target=keep_alive, args=(bot,), daemon=True).start()
+
     bot.run()
 
 if __name__ == "__main__":
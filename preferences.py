@@ -0,0 +1,111 @@
+"""Настройки чатов: фиатная валюта, избранные сети и профиль транзакции"""
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Поддерживаемые фиатные валюты и их символы
+CURRENCY_SYMBOLS = {
+    "usd": "$",
+    "eur": "€",
+    "rub": "₽",
+}
+
+# Профили транзакций: лимит газа для EVM-сетей
+TX_PROFILES = {
+    "transfer": {"title": "простого перевода", "gas": 21000},
+    "token": {"title": "перевода токена", "gas": 65000},
+    "swap": {"title": "обмена на DEX", "gas": 180000},
+}
+
+DEFAULT_CURRENCY = "usd"
+DEFAULT_PROFILE = "transfer"
+
+
+class ChatPrefs:
+    """Настройки одного чата; избранные сети хранятся битовой маской"""
+    __slots__ = ("currency", "favorites", "profile")
+
+    def __init__(self, currency: str = DEFAULT_CURRENCY, favorites: int = 0, profile: str = DEFAULT_PROFILE):
+        self.currency = currency
+        self.favorites = favorites
+        self.profile = profile
+
+
+class PreferencesStore:
+    """Хранилище настроек чатов в памяти с пакетной записью на диск"""
+
+    def __init__(self, path: str, chains: tuple):
+        self.path = path
+        self.chains = tuple(chains)
+        self.prefs = {}
+        self.default = ChatPrefs()
+        self.dirty = False
+
+    def get(self, chat_id: int) -> ChatPrefs:
+        """Настройки чата; для чатов без настроек возвращается общий экземпляр по умолчанию"""
+        return self.prefs.get(chat_id, self.default)
+
+    def update(self, chat_id: int, **changes) -> ChatPrefs:
+        """Изменение настроек чата; запись на диск происходит при следующем save()"""
+        prefs = self.prefs.get(chat_id)
+        if prefs is None:
+            prefs = self.prefs[chat_id] = ChatPrefs()
+        for name, value in changes.items():
+            setattr(prefs, name, value)
+        self.dirty = True
+        return prefs
+
+    def favorites_mask(self, chains: list) -> int:
+        """Битовая маска для списка сетей"""
+        mask = 0
+        for chain in chains:
+            mask |= 1 << self.chains.index(chain)
+        return mask
+
+    def favorite_chains(self, prefs: ChatPrefs) -> list:
+        """Список избранных сетей в порядке клавиатуры"""
+        return [chain for i, chain in enumerate(self.chains) if prefs.favorites >> i & 1]
+
+    def snapshot(self) -> dict:
+        """Копия настроек для записи вне event loop или None, если изменений нет"""
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return {
+            str(chat_id): [prefs.currency, prefs.favorites, prefs.profile]
+            for chat_id, prefs in self.prefs.items()
+        }
+
+    def write(self, data: dict):
+        """Пакетная атомарная запись всех изменений"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def save(self):
+        """Запись настроек, если они изменились"""
+        data = self.snapshot()
+        if data is not None:
+            self.write(data)
+
+    def load(self):
+        """Загрузка настроек с диска, если файл есть"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            for chat_id, (currency, favorites, profile) in data.items():
+                self.prefs[int(chat_id)] = ChatPrefs(
+                    currency if currency in CURRENCY_SYMBOLS else DEFAULT_CURRENCY,
+                    favorites,
+                    profile if profile in TX_PROFILES else DEFAULT_PROFILE,
+                )
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка загрузки настроек чатов: {e}")
@@ -0,0 +1,151 @@
+"""Инкрементальные сводки комиссий по часам недели для поиска самого дешевого времени"""
+import json
+import logging
+import os
+import time
+
+from estimators import P2Quantile
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 168
+WEEKDAYS = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+WEEKDAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def hour_of_week(ts: float) -> int:
+    """Номер часа недели в UTC: 0 — понедельник 00:00"""
+    t = time.gmtime(ts)
+    return t.tm_wday * 24 + t.tm_hour
+
+
+class HourBucket:
+    """Медиана и p90 одного уровня комиссии в одном часе недели"""
+    __slots__ = ("median", "p90")
+
+    def __init__(self, median: P2Quantile = None, p90: P2Quantile = None):
+        self.median = median or P2Quantile(0.5)
+        self.p90 = p90 or P2Quantile(0.9)
+
+    def update(self, value: float):
+        self.median.update(value)
+        self.p90.update(value)
+
+    @property
+    def count(self) -> int:
+        return self.median.count
+
+    def to_dict(self) -> list:
+        return [self.median.to_dict(), self.p90.to_dict()]
+
+    @classmethod
+    def from_dict(cls, data: list) -> "HourBucket":
+        return cls(P2Quantile.from_dict(data[0]), P2Quantile.from_dict(data[1]))
+
+
+class ChainRollup:
+    """168 корзин на каждый уровень комиссии одной сети"""
+    __slots__ = ("unit", "tiers", "last_ts")
+
+    def __init__(self, unit: str, tiers: dict = None, last_ts: float = 0.0):
+        self.unit = unit
+        self.tiers = tiers or {}
+        self.last_ts = last_ts
+
+    def to_dict(self) -> dict:
+        return {
+            "unit": self.unit,
+            "last_ts": self.last_ts,
+            "tiers": {name: [bucket.to_dict() for bucket in buckets] for name, buckets in self.tiers.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChainRollup":
+        tiers = {
+            name: [HourBucket.from_dict(item) for item in buckets]
+            for name, buckets in data["tiers"].items()
+        }
+        return cls(data["unit"], tiers, data["last_ts"])
+
+
+class BestTimeRollups:
+    """Сводки по часам недели для всех сетей с сохранением на диск"""
+
+    def __init__(self, path: str, min_interval: float = 60):
+        self.path = path
+        self.min_interval = min_interval
+        self.chains = {}
+        self.dirty = False
+
+    def observe(self, blockchain: str, tiers: dict, unit: str, ts: float = None) -> bool:
+        """Учет снимка комиссий за O(1): обновляется одна корзина на уровень"""
+        ts = ts or time.time()
+        rollup = self.chains.get(blockchain)
+        if rollup is None:
+            rollup = self.chains[blockchain] = ChainRollup(unit)
+        elif ts - rollup.last_ts < self.min_interval:
+            return False
+
+        hour = hour_of_week(ts)
+        for name, value in tiers.items():
+            if value is None:
+                continue
+            buckets = rollup.tiers.get(name)
+            if buckets is None:
+                buckets = rollup.tiers[name] = [HourBucket() for _ in range(HOURS_PER_WEEK)]
+            buckets[hour].update(float(value))
+
+        rollup.unit = unit
+        rollup.last_ts = ts
+        self.dirty = True
+        return True
+
+    def tiers(self, blockchain: str) -> list:
+        """Уровни комиссии, по которым у сети уже есть сводки"""
+        rollup = self.chains.get(blockchain)
+        return list(rollup.tiers) if rollup else []
+
+    def table(self, blockchain: str, tier: str) -> tuple:
+        """(единица, 168 пар (медиана, p90) или None для пустых часов); чтение без агрегации истории"""
+        rollup = self.chains.get(blockchain)
+        if rollup is None or tier not in rollup.tiers:
+            return None, None
+        rows = [
+            (bucket.median.value(), bucket.p90.value()) if bucket.count else None
+            for bucket in rollup.tiers[tier]
+        ]
+        return rollup.unit, rows
+
+    def snapshot(self) -> dict:
+        """Копия сводок для записи вне event loop или None, если изменений нет"""
+        if not self.dirty:
+            return None
+        self.dirty = False
+        return {name: rollup.to_dict() for name, rollup in self.chains.items()}
+
+    def write(self, data: dict):
+        """Атомарная запись сводок на диск"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    def save(self):
+        """Запись сводок, если они изменились"""
+        data = self.snapshot()
+        if data is not None:
+            self.write(data)
+
+    def load(self):
+        """Загрузка сводок с диска, если файл есть"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.chains = {name: ChainRollup.from_dict(item) for name, item in data.items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка загрузки сводок по часам недели: {e}")
@@ -0,0 +1,32 @@
+"""Пакетные JSON-RPC запросы: несколько вызовов в одном HTTP-запросе"""
+
+
+class JsonRpcError(Exception):
+    """Узел не вернул корректный пакетный ответ"""
+
+
+def build_batch(calls: list) -> list:
+    """Тело пакетного запроса из списка (метод, параметры)"""
+    return [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+
+
+def parse_batch(data, count: int) -> list:
+    """Результаты в порядке вызовов; для вызовов с ошибкой возвращается None"""
+    if not isinstance(data, list):
+        # Узлы без поддержки пакетов отвечают одним объектом с ошибкой
+        raise JsonRpcError(f"Ожидался пакетный ответ, получено: {data}")
+
+    results = [None] * count
+    for item in data:
+        i = item.get("id")
+        if isinstance(i, int) and 0 <= i < count and "error" not in item:
+            results[i] = item.get("result")
+    return results
+
+
+def hex_to_int(value: str) -> int:
+    """Число из hex-строки EVM-узла"""
+    return int(value, 16) if value is not None else None
@@ -0,0 +1,115 @@
+"""Конкурентная обработка обновлений: ограниченный прием, порядок внутри чата и пул обработчиков"""
+import asyncio
+import contextlib
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateScheduler:
+    """Ограничивает число одновременно работающих обработчиков и сохраняет порядок обновлений чата"""
+
+    def __init__(self, max_workers: int, shed_threshold: int, max_pending: int, max_chat_pending: int):
+        self.shed_threshold = shed_threshold
+        # Один чат не может занять больше max_chat_pending слотов приема, даже если его
+        # обновления стоят в очереди за одной блокировкой
+        self.max_chat_pending = max_chat_pending
+        self.workers = asyncio.Semaphore(max_workers)
+        # Слоты приема: обновление занимает слот от выдачи из очереди до конца обработки
+        self.intake = asyncio.Semaphore(max_pending)
+        # (тенант, chat_id) -> [блокировка, число ожидающих и работающих обновлений].
+        # Личный чат пользователя имеет один id у всех ботов, поэтому тенант входит в ключ
+        self.chat_locks = {}
+        self.admitted = 0
+
+    @property
+    def saturated(self) -> bool:
+        """Принято слишком много обновлений: обработчики должны отвечать из кэша, а не ходить в API"""
+        return self.admitted >= self.shed_threshold
+
+    async def admit(self):
+        """Ожидание свободного слота приема"""
+        await self.intake.acquire()
+        self.admitted += 1
+
+    def release(self):
+        """Освобождение слота приема после обработки обновления"""
+        self.admitted -= 1
+        self.intake.release()
+
+    def wrap(self, callback, scope: str = ""):
+        """Обертка обработчика: сначала очередь чата в пределах scope (тенанта), затем слот в пуле"""
+        @functools.wraps(callback)
+        async def wrapper(update, context):
+            chat = update.effective_chat
+            if chat is None:
+                async with self.workers:
+                    return await callback(update, context)
+
+            entry = self.chat_locks.get((scope, chat.id))
+            if entry is not None and entry[1] >= self.max_chat_pending:
+                # Лишнее обновление сразу освобождает слот приема, не дожидаясь очереди чата
+                return await self.shed(update)
+            async with self.chat_turn(scope, chat.id):
+                async with self.workers:
+                    return await callback(update, context)
+
+        return wrapper
+
+    @contextlib.asynccontextmanager
+    async def chat_turn(self, scope: str, chat_id: int):
+        """Очередь чата: asyncio.Lock пропускает ожидающих по очереди, поэтому порядок сохраняется"""
+        key = (scope, chat_id)
+        entry = self.chat_locks.get(key)
+        if entry is None:
+            entry = self.chat_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.chat_locks[key]
+
+    async def run_in_chat(self, scope: str, chat_id: int, callback):
+        """Фоновая работа в очереди чата, по порядку с обработчиками его обновлений"""
+        async with self.chat_turn(scope, chat_id):
+            return await callback()
+
+    async def shed(self, update):
+        """Отказ от обновления перегруженного чата; нажатие кнопки получает короткий ответ"""
+        logger.warning(f"Чат {update.effective_chat.id}: слишком много обновлений в очереди, обновление пропущено")
+        if update.callback_query is not None:
+            try:
+                await update.callback_query.answer("⏳ Предыдущие запросы еще обрабатываются")
+            except Exception as e:
+                logger.error(f"Ошибка ответа на пропущенное нажатие: {e}")
+
+
+class IntakeQueue(asyncio.Queue):
+    """Очередь обновлений Application, которая не выдает обновление без слота приема.
+
+    Application создает задачу на каждое полученное обновление, поэтому ограничивать нужно выдачу
+    из очереди. Пока слотов нет, очередь заполняется до maxsize и Updater перестает запрашивать
+    новые обновления у Telegram.
+    """
+
+    def __init__(self, scheduler: UpdateScheduler, maxsize: int):
+        super().__init__(maxsize)
+        self.scheduler = scheduler
+        self.admitted = 0
+
+    async def get(self):
+        item = await super().get()
+        await self.scheduler.admit()
+        self.admitted += 1
+        return item
+
+    def task_done(self):
+        super().task_done()
+        # При остановке Application отмечает и необработанные элементы, слотов у них нет
+        if self.admitted > 0:
+            self.admitted -= 1
+            self.scheduler.release()
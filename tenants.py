@@ -0,0 +1,39 @@
+"""Конфигурация брендированных экземпляров бота (тенантов) в одном процессе"""
+import json
+import os
+
+DEFAULT_WELCOME = "🤖 Добро пожаловать в бот мониторинга комиссий блокчейнов!"
+
+
+class Tenant:
+    """Один токен бота со своим Application и оформлением"""
+    __slots__ = ("name", "token", "welcome", "footer", "application")
+
+    def __init__(self, name: str, token: str, welcome: str = DEFAULT_WELCOME, footer: str = ""):
+        self.name = name
+        self.token = token
+        self.welcome = welcome
+        self.footer = footer
+        self.application = None
+
+
+def load_tenants() -> list:
+    """Тенанты из TENANTS_FILE (JSON-список) или из TELEGRAM_BOT_TOKEN(S) с оформлением по умолчанию"""
+    path = os.getenv('TENANTS_FILE')
+    if path:
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+        return [
+            Tenant(
+                item.get("name", f"bot{i}"),
+                item["token"],
+                item.get("welcome", DEFAULT_WELCOME),
+                item.get("footer", ""),
+            )
+            for i, item in enumerate(items)
+        ]
+
+    tokens = [token.strip() for token in os.getenv('TELEGRAM_BOT_TOKENS', '').split(",") if token.strip()]
+    if not tokens and os.getenv('TELEGRAM_BOT_TOKEN'):
+        tokens = [os.getenv('TELEGRAM_BOT_TOKEN')]
+    return [Tenant(f"bot{i}", token) for i, token in enumerate(tokens)]